@@ -0,0 +1,393 @@
+"""
+Studio (admin) blueprint - painting management, inbox, statistics and metrics under /studio
+"""
+from datetime import datetime, timedelta
+import hmac
+import json
+
+from flask import Blueprint, abort, current_app, flash, jsonify, make_response, redirect, render_template, request, url_for
+from flask_login import LoginManager, current_user, login_required, login_user, logout_user
+
+from extensions import job_queue, metrics as worker_metrics
+from imaging import build_renditions, image_features, image_preview, remove_renditions
+from jobs import ACTIVE as ACTIVE_JOB_STATUSES
+from models import (db, Admin, Painting, ContactMessage, Counter, InquiryStat, Job, adjust_counters, bump_catalog_version,
+                    update_similar_paintings)
+from pagination import decode_cursor, encode_cursor
+from storage import store_stream, remove_file
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+bp = Blueprint('admin', __name__, url_prefix='/studio')
+login_manager = LoginManager()
+login_manager.login_view = 'admin.login'
+
+@bp.record_once
+def setup(state):
+    # No current_user in templates: loading it would touch the session on every public page
+    login_manager.init_app(state.app, add_context_processor=False)
+    state.app.extensions['job_queue'].register('renditions', build_renditions, apply_renditions)
+    state.app.extensions['job_queue'].register('features', image_features, apply_features)
+    state.app.extensions['job_queue'].register('preview', image_preview, apply_preview)
+
+@login_manager.user_loader
+def load_user(user_id):
+    return Admin.query.get(int(user_id))
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        abort(400)
+
+def inbox_query(args):
+    """Contact messages matching the inbox filters in `args`"""
+    query = ContactMessage.query
+    status = args.get('status')
+    if status == 'unread':
+        query = query.filter(ContactMessage.is_read == False)
+    elif status == 'read':
+        query = query.filter(ContactMessage.is_read == True)
+    painting_id = args.get('painting', type=int)
+    if painting_id:
+        query = query.filter(ContactMessage.painting_id == painting_id)
+    date_from = parse_date(args.get('date_from'))
+    if date_from:
+        query = query.filter(ContactMessage.created_at >= date_from)
+    date_to = parse_date(args.get('date_to'))
+    if date_to:
+        query = query.filter(ContactMessage.created_at < date_to + timedelta(days=1))
+    search = (args.get('q') or '').strip()
+    if search:
+        query = query.filter(db.or_(
+            ContactMessage.name.contains(search, autoescape=True),
+            ContactMessage.email.contains(search, autoescape=True),
+            ContactMessage.message.contains(search, autoescape=True),
+        ))
+    return query
+
+def save_painting_image(painting, file):
+    """Store an uploaded image on the painting under its content hash.
+
+    Renditions and the preview (dimensions, colour, placeholder) are reused
+    from a painting with the same image, or built by background jobs queued
+    here, as are the features. Returns the (image, renditions) the painting
+    held before, for release_image() once committed.
+    """
+    previous = (painting.image, painting.get_renditions())
+    # From the name as uploaded, split as allowed_file() validated it ('картина.jpg' and '.jpg' both give .jpg)
+    ext = '.' + file.filename.rsplit('.', 1)[1].lower()
+    filename = store_stream(file.stream, current_app.config['UPLOAD_FOLDER'], ext)
+    # Both lookups before painting.image changes, so autoflush cannot match the painting itself
+    twin = Painting.query.filter(Painting.image == filename, Painting.renditions.isnot(None)).first()
+    preview_twin = Painting.query.filter(Painting.image == filename, Painting.placeholder.isnot(None)).first()
+    painting.image = filename
+    painting.renditions = twin.renditions if twin is not None else None
+    painting.set_preview(preview_twin.get_preview() if preview_twin is not None else None)
+    painting.features = None
+    if twin is None:
+        job_queue.enqueue('renditions', upload_folder=current_app.config['UPLOAD_FOLDER'], filename=filename)
+    if preview_twin is None:
+        job_queue.enqueue('preview', upload_folder=current_app.config['UPLOAD_FOLDER'], filename=filename)
+    # Even for a twin: the new painting needs its own rows in the similar works index
+    job_queue.enqueue('features', upload_folder=current_app.config['UPLOAD_FOLDER'], filename=filename)
+    return previous
+
+def apply_renditions(payload, renditions):
+    """Job callback: attach built renditions to every painting showing the image"""
+    updated = Painting.query.filter_by(image=payload['filename']).update(
+        {Painting.renditions: json.dumps(renditions)}, synchronize_session=False)
+    if updated:
+        bump_catalog_version()
+    else:
+        # The image was replaced or deleted while the job ran
+        remove_renditions(payload['upload_folder'], renditions)
+
+def apply_preview(payload, preview):
+    """Job callback: store dimensions, colour and placeholder on every painting showing the image"""
+    updated = Painting.query.filter_by(image=payload['filename']).update({
+        Painting.image_width: preview['width'],
+        Painting.image_height: preview['height'],
+        Painting.dominant_color: preview['color'],
+        Painting.placeholder: preview['placeholder'],
+    }, synchronize_session=False)
+    if updated:
+        bump_catalog_version()
+
+def apply_features(payload, features):
+    """Job callback: store image features on every painting showing the image and re-rank similar works"""
+    painting_ids = db.session.scalars(db.select(Painting.id).filter_by(image=payload['filename'])).all()
+    if painting_ids:
+        Painting.query.filter(Painting.id.in_(painting_ids)).update(
+            {Painting.features: json.dumps(features)}, synchronize_session=False)
+        update_similar_paintings(changed=painting_ids)
+        bump_catalog_version()
+
+def release_image(filename, renditions):
+    """Delete an image file and its renditions once no painting references it"""
+    if not filename or db.session.query(Painting.id).filter_by(image=filename).first():
+        return
+    remove_file(current_app.config['UPLOAD_FOLDER'], filename)
+    remove_renditions(current_app.config['UPLOAD_FOLDER'], renditions)
+
+# ============== ROUTES ==============
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('admin.dashboard'))
+    
+    if request.method == 'POST':
+        username = request.form.get('username')
+        password = request.form.get('password')
+        admin = Admin.query.filter_by(username=username).first()
+        
+        if admin and admin.check_password(password):
+            login_user(admin)
+            return redirect(url_for('admin.dashboard'))
+        flash('Невірний логін або пароль', 'error')
+    
+    return render_template('admin/login.html')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('home'))
+
+@bp.route('')
+@login_required
+def dashboard():
+    counters = dict(db.session.query(Counter.name, Counter.value))
+    recent_messages = ContactMessage.query.options(db.selectinload(ContactMessage.painting)).order_by(
+        ContactMessage.created_at.desc()).limit(5).all()
+    return render_template('admin/dashboard.html', 
+                         paintings_count=counters.get('paintings_total', 0),
+                         available_count=counters.get('paintings_available', 0),
+                         sold_count=counters.get('paintings_sold', 0),
+                         messages_count=counters.get('messages_unread', 0),
+                         recent_messages=recent_messages)
+
+@bp.route('/stats/inquiries')
+@login_required
+def inquiry_stats():
+    """Inquiries per painting bucketed by day, week or month, as JSON for charts"""
+    bucket_formats = {'day': '%Y-%m-%d', 'week': '%Y-W%W', 'month': '%Y-%m'}
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in bucket_formats:
+        abort(400)
+    days = request.args.get('days', 30, type=int)
+    period = db.func.strftime(bucket_formats[bucket], InquiryStat.day)
+    query = db.session.query(InquiryStat.painting_id, period, db.func.sum(InquiryStat.count)).filter(
+        InquiryStat.day >= datetime.utcnow().date() - timedelta(days=days)
+    )
+    painting_id = request.args.get('painting', type=int)
+    if painting_id:
+        query = query.filter(InquiryStat.painting_id == painting_id)
+    rows = query.group_by(InquiryStat.painting_id, period).order_by(period).all()
+    return jsonify({
+        'bucket': bucket,
+        'data': [{'painting_id': pid, 'period': p, 'count': count} for pid, p, count in rows],
+    })
+
+@bp.route('/paintings')
+@login_required
+def paintings():
+    paintings = Painting.query.order_by(Painting.order, Painting.created_at.desc()).all()
+    # Images whose renditions are still being built, to show and poll their status
+    image_jobs = {}
+    for job in Job.query.filter(Job.kind == 'renditions', Job.status.in_(ACTIVE_JOB_STATUSES)):
+        image_jobs[job.get_payload()['filename']] = job.id
+    return render_template('admin/paintings.html', paintings=paintings, image_jobs=image_jobs)
+
+@bp.route('/paintings/add', methods=['GET', 'POST'])
+@login_required
+def add_painting():
+    if request.method == 'POST':
+        painting = Painting(
+            title_uk=request.form.get('title_uk'),
+            title_en=request.form.get('title_en'),
+            title_ru=request.form.get('title_ru'),
+            description_uk=request.form.get('description_uk'),
+            description_en=request.form.get('description_en'),
+            description_ru=request.form.get('description_ru'),
+            width=int(request.form.get('width')) if request.form.get('width') else None,
+            height=int(request.form.get('height')) if request.form.get('height') else None,
+            year=int(request.form.get('year')) if request.form.get('year') else None,
+            technique_uk=request.form.get('technique_uk') or 'Олія на полотні',
+            technique_en=request.form.get('technique_en') or 'Oil on canvas',
+            technique_ru=request.form.get('technique_ru') or 'Масло на холсте',
+            price=float(request.form.get('price')) if request.form.get('price') else None,
+            is_sold=request.form.get('is_sold') == 'on',
+            is_featured=request.form.get('is_featured') == 'on',
+            order=int(request.form.get('order')) if request.form.get('order') else 0
+        )
+        
+        if 'image' in request.files:
+            file = request.files['image']
+            if file and file.filename and allowed_file(file.filename):
+                save_painting_image(painting, file)
+        
+        db.session.add(painting)
+        bump_catalog_version()
+        db.session.commit()
+        job_queue.kick()
+        flash('Картину додано!', 'success')
+        return redirect(url_for('admin.paintings'))
+    
+    return render_template('admin/painting_form.html', painting=None)
+
+@bp.route('/paintings/edit/<int:painting_id>', methods=['GET', 'POST'])
+@login_required
+def edit_painting(painting_id):
+    painting = Painting.query.get_or_404(painting_id)
+    
+    if request.method == 'POST':
+        painting.title_uk = request.form.get('title_uk')
+        painting.title_en = request.form.get('title_en')
+        painting.title_ru = request.form.get('title_ru')
+        painting.description_uk = request.form.get('description_uk')
+        painting.description_en = request.form.get('description_en')
+        painting.description_ru = request.form.get('description_ru')
+        painting.width = int(request.form.get('width')) if request.form.get('width') else None
+        painting.height = int(request.form.get('height')) if request.form.get('height') else None
+        painting.year = int(request.form.get('year')) if request.form.get('year') else None
+        painting.technique_uk = request.form.get('technique_uk')
+        painting.technique_en = request.form.get('technique_en')
+        painting.technique_ru = request.form.get('technique_ru')
+        painting.price = float(request.form.get('price')) if request.form.get('price') else None
+        painting.is_sold = request.form.get('is_sold') == 'on'
+        painting.is_featured = request.form.get('is_featured') == 'on'
+        painting.order = int(request.form.get('order')) if request.form.get('order') else 0
+        
+        previous = None
+        if 'image' in request.files:
+            file = request.files['image']
+            if file and file.filename and allowed_file(file.filename):
+                previous = save_painting_image(painting, file)
+        
+        bump_catalog_version()
+        db.session.commit()
+        job_queue.kick()
+        if previous and previous[0] != painting.image:
+            release_image(*previous)
+        flash('Картину оновлено!', 'success')
+        return redirect(url_for('admin.paintings'))
+    
+    return render_template('admin/painting_form.html', painting=painting)
+
+@bp.route('/paintings/delete/<int:painting_id>', methods=['POST'])
+@login_required
+def delete_painting(painting_id):
+    painting = Painting.query.get_or_404(painting_id)
+    image, renditions = painting.image, painting.get_renditions()
+    db.session.delete(painting)
+    if painting.features:
+        update_similar_paintings(removed=[painting_id])
+    bump_catalog_version()
+    db.session.commit()
+    release_image(image, renditions)
+    flash('Картину видалено!', 'success')
+    return redirect(url_for('admin.paintings'))
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus exposition of this worker's request, SQL and template metrics"""
+    token = current_app.config['METRICS_TOKEN']
+    authorized = current_user.is_authenticated or (
+        token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'))
+    if not authorized:
+        return login_manager.unauthorized()
+    response = make_response(worker_metrics.render())
+    response.mimetype = 'text/plain'
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+@bp.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    return jsonify(Job.query.get_or_404(job_id).to_dict())
+
+@bp.route('/messages')
+@login_required
+def messages():
+    query = inbox_query(request.args).options(db.selectinload(ContactMessage.painting))
+    cursor = request.args.get('cursor')
+    if cursor:
+        created_at, message_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(db.or_(
+            ContactMessage.created_at < created_at,
+            db.and_(ContactMessage.created_at == created_at, ContactMessage.id < message_id),
+        ))
+    limit = current_app.config['INBOX_PAGE_SIZE']
+    messages = query.order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id)
+    
+    filters = {key: value for key, value in request.args.items() if key != 'cursor' and value}
+    # One index lookup per painting, so the cost follows the catalog, not the inbox
+    has_messages = db.exists().where(ContactMessage.painting_id == Painting.id)
+    inquired = db.session.query(Painting.id, Painting.title_uk).filter(has_messages).order_by(Painting.title_uk).all()
+    return render_template('admin/messages.html', messages=messages, filters=filters,
+                           next_cursor=next_cursor, inquired_paintings=inquired)
+
+def studio_path(target):
+    """`target` if it is a path inside the studio, else None (no redirects off the site)"""
+    if not target or not target.startswith(bp.url_prefix) or '\\' in target:
+        return None
+    path = target.split('?', 1)[0]
+    if path != bp.url_prefix and not path.startswith(bp.url_prefix + '/'):
+        return None
+    return target
+
+@bp.route('/messages/batch', methods=['POST'])
+@login_required
+def messages_batch():
+    """Mark read or delete many messages in one transaction"""
+    action = request.form.get('action')
+    if action not in ('read', 'delete'):
+        abort(400)
+    if request.form.get('scope') == 'matching':
+        query = inbox_query(request.form)
+    else:
+        ids = [int(i) for i in request.form.getlist('ids') if i.isdigit()]
+        query = ContactMessage.query.filter(ContactMessage.id.in_(ids))
+    
+    # Bulk statements bypass the mapper events, so counters are adjusted here
+    if action == 'read':
+        affected = query.filter(ContactMessage.is_read == False).update(
+            {ContactMessage.is_read: True}, synchronize_session=False)
+        adjust_counters(db.session.connection(), {'messages_unread': -affected})
+        flash(f'Позначено прочитаними: {affected}', 'success')
+    else:
+        unread = query.filter(ContactMessage.is_read == False).count()
+        affected = query.delete(synchronize_session=False)
+        adjust_counters(db.session.connection(), {'messages_total': -affected, 'messages_unread': -unread})
+        flash(f'Видалено повідомлень: {affected}', 'success')
+    db.session.commit()
+    
+    if request.headers.get('Accept') == 'application/json':
+        return jsonify({'success': True, 'affected': affected})
+    return redirect(studio_path(request.form.get('next')) or url_for('admin.messages'))
+
+@bp.route('/messages/mark-read/<int:message_id>', methods=['POST'])
+@login_required
+def mark_read(message_id):
+    msg = ContactMessage.query.get_or_404(message_id)
+    msg.is_read = True
+    db.session.commit()
+    return jsonify({'success': True})
+
+@bp.route('/messages/delete/<int:message_id>', methods=['POST'])
+@login_required
+def delete_message(message_id):
+    msg = ContactMessage.query.get_or_404(message_id)
+    db.session.delete(msg)
+    db.session.commit()
+    flash('Повідомлення видалено!', 'success')
+    return redirect(url_for('admin.messages'))
@@ -1,466 +1,561 @@
 """
 Impressionism by Alexey Kurevin - Artist Portfolio & Gallery
+
+create_app() builds the site; the module-level `app` is what gunicorn and
+Vercel import. Anything a cold start can skip waits for first use: database
+engines (models.LazySQLAlchemy), Pillow, the job pool, the template digest
+and the modules only CLI commands use; compiled templates are kept on disk
+between processes. coldstart.py reports what a cold start still costs.
 """
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, make_response, abort, send_file, current_app
+from flask.cli import with_appcontext
+from werkzeug.utils import safe_join
 from datetime import datetime
+from functools import lru_cache, partial, wraps
+import hashlib
 import os
 import json
+import sys
+import tempfile
+import threading
+from urllib.parse import urlsplit, urlunsplit
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'kurevin-art-secret-key-2026'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///kurevin.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'static/images/paintings'
-app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024  # 32MB max
+import click
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
 
-# Contact settings
-app.config['CONTACT_EMAIL'] = 'kurevin.art@gmail.com'
-app.config['CONTACT_PHONE'] = '+380501234567'
-app.config['CONTACT_TELEGRAM'] = 'kurevin_art'
+from assets import AssetBundle, StaticManifest, IMMUTABLE_CACHE_CONTROL, file_digest, minify_css, minify_js
+from catalog_snapshot import CatalogSnapshots
+from compression import compress, is_compressible, negotiate, precompressed_sibling, write_siblings
+from i18n import DEFAULT_LANG, load_catalogs, compile_catalogs
+from disk_cache import DiskCache
+from extensions import (translations, static_manifest, asset_bundle, page_cache, image_cache, compressed_bodies,
+                        catalog_snapshots, message_batcher, job_queue)
+from imaging import RENDITION_DIR, build_renditions, image_features, image_preview, resize_image, supported_formats
+from jobs import JobQueue
+from metrics import Metrics, instrument, instrument_engine
+from migrations import explain, is_table_scan
+from models import (db, Admin, Painting, ContactMessage, Job, upgrade_schema, bump_catalog_version,
+                    rebuild_similar_paintings)
+from page_cache import PageCache
+from pagination import encode_cursor, decode_cursor
+from search import match_expression, search_sql
+from sqlite_concurrency import DEFAULT_PRAGMAS, WriteBatcher, apply_pragmas, app_read_engine
+from storage import find_orphans
 
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'admin_login'
+@lru_cache(maxsize=None)
+def resize_formats():
+    """URL extension -> encoder, for the formats this Pillow can write"""
+    return {ext: fmt for ext, fmt in (('avif', 'avif'), ('webp', 'webp'), ('jpg', 'jpeg'))
+            if fmt in supported_formats()}
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+@db.on_engine_created
+def setup_engine(app, engine):
+    """Prepare a database engine when the app first needs it"""
+    apply_pragmas(engine, app.config['SQLITE_PRAGMAS'])
+    instrument_engine(engine)
+    instrument_engine(app_read_engine(engine))
+    # A current schema is only read, so read-only deployments work; flask migrate
+    # upgrades ahead of time, and a database it missed (or a new one) is upgraded here
+    app.extensions['schema_migrations'] = upgrade_schema(engine)
+    for version, description in app.extensions['schema_migrations']:
+        app.logger.info("Applied schema migration %s (%s)", version, description)
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# ============== HELPERS ==============
 
-# ============== MODELS ==============
+def get_lang():
+    """Language of the current page: its URL prefix, else the visitor's preference"""
+    return g.get('lang') or preferred_lang()
 
-class Admin(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(256), nullable=False)
-    
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
-    
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-class Painting(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    # Titles in 3 languages
-    title_uk = db.Column(db.String(200), nullable=False)
-    title_en = db.Column(db.String(200), nullable=False)
-    title_ru = db.Column(db.String(200), nullable=False)
-    # Descriptions
-    description_uk = db.Column(db.Text)
-    description_en = db.Column(db.Text)
-    description_ru = db.Column(db.Text)
-    # Technical details
-    width = db.Column(db.Integer)  # in cm
-    height = db.Column(db.Integer)  # in cm
-    year = db.Column(db.Integer)
-    technique_uk = db.Column(db.String(100))  # e.g., "Олія на полотні"
-    technique_en = db.Column(db.String(100))  # e.g., "Oil on canvas"
-    technique_ru = db.Column(db.String(100))  # e.g., "Масло на холсте"
-    # Pricing & availability
-    price = db.Column(db.Float)  # in USD
-    is_sold = db.Column(db.Boolean, default=False)
-    is_available = db.Column(db.Boolean, default=True)
-    is_featured = db.Column(db.Boolean, default=False)
-    # Image
-    image = db.Column(db.String(255))
-    # Metadata
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    order = db.Column(db.Integer, default=0)
-    
-    def get_title(self, lang):
-        return getattr(self, f'title_{lang}', self.title_en)
-    
-    def get_description(self, lang):
-        return getattr(self, f'description_{lang}', self.description_en)
-    
-    def get_technique(self, lang):
-        return getattr(self, f'technique_{lang}', self.technique_en)
-    
-    def get_size_display(self):
-        if self.width and self.height:
-            return f"{self.width} × {self.height} cm"
-        return None
-
-class ContactMessage(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
-    phone = db.Column(db.String(30))
-    painting_id = db.Column(db.Integer, db.ForeignKey('painting.id'))
-    message = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    is_read = db.Column(db.Boolean, default=False)
-    
-    painting = db.relationship('Painting', backref='inquiries')
+def preferred_lang():
+    """Language for URLs without a prefix: the pre-prefix cookie or session, then Accept-Language"""
+    lang = request.cookies.get('lang') or session.get('lang')
+    if lang in translations:
+        return lang
+    return request.accept_languages.best_match(list(translations)) or DEFAULT_LANG
 
-class SiteSettings(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    key = db.Column(db.String(50), unique=True, nullable=False)
-    value_uk = db.Column(db.Text)
-    value_en = db.Column(db.Text)
-    value_ru = db.Column(db.Text)
+def get_translations():
+    """Return translations mapping for current language"""
+    return translations[get_lang()]
 
-# ============== HELPERS ==============
+def catalog():
+    """The catalog snapshot public pages read, the same one for the whole request"""
+    if 'catalog' not in g:
+        g.catalog = catalog_snapshots.get(db.session)
+    return g.catalog
 
-@login_manager.user_loader
-def load_user(user_id):
-    return Admin.query.get(int(user_id))
+def get_catalog_version():
+    return catalog().version
 
-def get_lang():
-    lang = session.get('lang', 'uk')
-    if lang not in ['uk', 'en', 'ru']:
-        lang = 'uk'
-    return lang
+def sources_digest(*folders, extensions=('.json', '.html')):
+    """Hash of templates and translations, so cache keys and ETags change with them"""
+    digest = hashlib.sha256()
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(extensions):
+                    path = os.path.join(root, name)
+                    digest.update(f"{os.path.relpath(path, folder)}:{file_digest(path)}".encode())
+    return digest.hexdigest()[:12]
 
-def get_translations():
-    """Return translations dictionary for current language"""
-    lang = get_lang()
-    translations = {
-        'uk': {
-            'site_title': 'Імпресіонізм Олексія Куревіна',
-            'nav_home': 'Головна',
-            'nav_gallery': 'Галерея',
-            'nav_about': 'Про художника',
-            'nav_contact': 'Контакти',
-            'hero_subtitle': 'Світло, колір та емоції на полотні',
-            'view_gallery': 'Переглянути роботи',
-            'contact_artist': 'Зв\'язатися з художником',
-            'featured_works': 'Вибрані роботи',
-            'all_works': 'Усі роботи',
-            'about_title': 'Про художника',
-            'contact_title': 'Зв\'язатися',
-            'contact_subtitle': 'Якщо вас зацікавила робота або ви бажаєте замовити картину',
-            'your_name': 'Ваше ім\'я',
-            'your_email': 'Ваш email',
-            'your_phone': 'Телефон',
-            'your_message': 'Повідомлення',
-            'send': 'Надіслати',
-            'price': 'Ціна',
-            'size': 'Розмір',
-            'year': 'Рік',
-            'technique': 'Техніка',
-            'oil_on_canvas': 'Олія на полотні',
-            'available': 'Доступна',
-            'sold': 'Продано',
-            'inquire': 'Запитати про цю роботу',
-            'back_to_gallery': 'Повернутися до галереї',
-            'interested_in': 'Мене цікавить робота',
-            'message_sent': 'Дякуємо! Ваше повідомлення надіслано.',
-            'all_paintings': 'Усі картини',
-            'filter_available': 'Доступні',
-            'filter_sold': 'Продані',
-        },
-        'en': {
-            'site_title': 'Impressionism by Alexey Kurevin',
-            'nav_home': 'Home',
-            'nav_gallery': 'Gallery',
-            'nav_about': 'About',
-            'nav_contact': 'Contact',
-            'hero_subtitle': 'Light, color and emotion on canvas',
-            'view_gallery': 'View Gallery',
-            'contact_artist': 'Contact the Artist',
-            'featured_works': 'Featured Works',
-            'all_works': 'All Works',
-            'about_title': 'About the Artist',
-            'contact_title': 'Get in Touch',
-            'contact_subtitle': 'If you are interested in a work or would like to commission a painting',
-            'your_name': 'Your Name',
-            'your_email': 'Your Email',
-            'your_phone': 'Phone',
-            'your_message': 'Message',
-            'send': 'Send',
-            'price': 'Price',
-            'size': 'Size',
-            'year': 'Year',
-            'technique': 'Technique',
-            'oil_on_canvas': 'Oil on canvas',
-            'available': 'Available',
-            'sold': 'Sold',
-            'inquire': 'Inquire about this work',
-            'back_to_gallery': 'Back to Gallery',
-            'interested_in': 'I am interested in the work',
-            'message_sent': 'Thank you! Your message has been sent.',
-            'all_paintings': 'All Paintings',
-            'filter_available': 'Available',
-            'filter_sold': 'Sold',
-        },
-        'ru': {
-            'site_title': 'Импрессионизм Алексея Куревина',
-            'nav_home': 'Главная',
-            'nav_gallery': 'Галерея',
-            'nav_about': 'О художнике',
-            'nav_contact': 'Контакты',
-            'hero_subtitle': 'Свет, цвет и эмоции на холсте',
-            'view_gallery': 'Смотреть работы',
-            'contact_artist': 'Связаться с художником',
-            'featured_works': 'Избранные работы',
-            'all_works': 'Все работы',
-            'about_title': 'О художнике',
-            'contact_title': 'Связаться',
-            'contact_subtitle': 'Если вас заинтересовала работа или вы хотите заказать картину',
-            'your_name': 'Ваше имя',
-            'your_email': 'Ваш email',
-            'your_phone': 'Телефон',
-            'your_message': 'Сообщение',
-            'send': 'Отправить',
-            'price': 'Цена',
-            'size': 'Размер',
-            'year': 'Год',
-            'technique': 'Техника',
-            'oil_on_canvas': 'Масло на холсте',
-            'available': 'Доступна',
-            'sold': 'Продано',
-            'inquire': 'Узнать об этой работе',
-            'back_to_gallery': 'Вернуться в галерею',
-            'interested_in': 'Меня интересует работа',
-            'message_sent': 'Спасибо! Ваше сообщение отправлено.',
-            'all_paintings': 'Все картины',
-            'filter_available': 'Доступные',
-            'filter_sold': 'Проданные',
-        }
-    }
-    return translations.get(lang, translations['uk'])
+def render_digest():
+    """sources_digest() of this app's templates, translations and inlined scripts plus the asset build, computed on first use"""
+    digest = current_app.extensions.get('render_digest')
+    if digest is None:
+        digest = current_app.extensions['render_digest'] = sources_digest(
+            os.path.join(current_app.root_path, current_app.template_folder), current_app.config['TRANSLATIONS_FOLDER'],
+            os.path.join(current_app.static_folder, 'js'), extensions=('.json', '.html', '.js')) + asset_bundle.digest
+    return digest
+
+def cached_page(view):
+    """Serve a public GET view from the rendered-page cache, answering 304 when the ETag matches"""
+    @wraps(view)
+    def wrapper(**kwargs):
+        if '_flashes' in session:
+            # The page would render (and consume) flash messages
+            return view(**kwargs)
+        key = (render_digest(), get_catalog_version(), request.host_url, request.endpoint, tuple(sorted(kwargs.items())),
+               tuple(sorted(request.args.items(multi=True))), get_lang(), datetime.now().year)
+        etag = hashlib.sha1(repr(key).encode()).hexdigest()
+        # Weak match: compress_response() weakens the ETag of compressed bodies
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        entry = page_cache.get(key)
+        if entry is None:
+            rv = view(**kwargs)
+            if isinstance(rv, str):
+                entry = (rv.encode('utf-8'), 'text/html')
+            elif getattr(rv, 'status_code', None) == 200 and not rv.is_streamed:
+                entry = (rv.get_data(), rv.mimetype)
+            else:
+                return rv
+            page_cache.set(key, *entry)
+        response = make_response(entry[0])
+        response.mimetype = entry[1]
+        response.set_etag(etag)
+        return response
+    return wrapper
+
+def cached_api(view):
+    """Serve a read-only JSON view from the page cache until the catalog changes.
+
+    The view returns a JSON-serializable value; repeat calls reuse the
+    serialized body without touching the ORM. The weak ETag follows the
+    catalog version.
+    """
+    @wraps(view)
+    def wrapper(**kwargs):
+        key = ('api', get_catalog_version(), request.host_url, request.endpoint, tuple(sorted(kwargs.items())),
+               tuple(sorted(request.args.items(multi=True))))
+        etag = hashlib.sha1(repr(key).encode()).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            body = page_cache.get(key)
+            if body is None:
+                body = (json.dumps(view(**kwargs), ensure_ascii=False, separators=(',', ':')).encode('utf-8'),)
+                page_cache.set(key, *body)
+            response = make_response(body[0])
+            response.mimetype = 'application/json'
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = current_app.config['PUBLIC_CACHE_CONTROL']
+        return response
+    return wrapper
+
+def painting_cursor(painting):
+    return encode_cursor(painting.order, painting.created_at, painting.id)
+
+GALLERY_FILTERS = ('all', 'available', 'sold')
+
+def gallery_page(filter_type, cursor=None, limit=None):
+    """One page of the gallery after `cursor`, plus the cursor for the next page"""
+    if filter_type not in GALLERY_FILTERS:
+        filter_type = 'all'
+    after = decode_cursor(cursor, int, datetime, int) if cursor else None
+    limit = limit or current_app.config['GALLERY_PAGE_SIZE']
+    paintings, more = catalog().gallery_page(filter_type, after, limit)
+    return paintings, painting_cursor(paintings[-1]) if more else None
+
+def home_paintings():
+    snapshot = catalog()
+    return snapshot.featured[:6] or snapshot.available_by_order[:6]
+
+RELATED_LIMIT = 4
+
+def related_paintings(painting_id):
+    """Other works shown under a painting: its nearest available neighbours by image features.
+
+    Paintings without features yet (or with too few available neighbours) are
+    topped up with the first available works by order.
+    """
+    snapshot = catalog()
+    neighbours = (snapshot.get(similar_id) for similar_id in snapshot.similar.get(painting_id, ()))
+    related = [p for p in neighbours if p is not None and p.is_available][:RELATED_LIMIT]
+    if len(related) < RELATED_LIMIT:
+        shown = {painting_id, *(p.id for p in related)}
+        related += [p for p in snapshot.available_by_order if p.id not in shown][:RELATED_LIMIT - len(related)]
+    return related
+
+def search_paintings(text):
+    """Available paintings matching `text`, best matches first"""
+    expression = match_expression(text)
+    if not expression:
+        return []
+    statement = db.text(search_sql(current_app.config['SEARCH_LIMIT']))
+    return db.session.query(Painting).from_statement(statement).params(query=expression).all()
+
+def snap_width(width):
+    """Smallest allowed resize width covering `width`, or the largest allowed"""
+    widths = current_app.config['IMAGE_WIDTHS']
+    return next((w for w in widths if w >= width), widths[-1])
+
+def srcset_filter(entries):
+    return ', '.join(
+        f"{url_for('static', filename='images/paintings/renditions/' + name)} {width}w"
+        for width, name in entries
+    )
+
+def inline_critical_css():
+    """The current page's critical rules for an inline <style>, or None to link the stylesheet as usual"""
+    css = asset_bundle.critical_css(request.endpoint)
+    return Markup(css) if css else None
+
+def site_stylesheet():
+    return asset_bundle.stylesheet
+
+def inline_script(filename):
+    return Markup(asset_bundle.script(filename))
+
+def fingerprint_static_url(endpoint, values):
+    """Append the content hash to static URLs so they can be cached forever"""
+    if endpoint == 'static' and 'v' not in values:
+        digest = static_manifest.get(values['filename'])
+        if digest:
+            values['v'] = digest
+
+def static_cache_headers(response):
+    if request.endpoint == 'static' and response.status_code in (200, 206, 304):
+        version = request.args.get('v')
+        if version and version == static_manifest.get(request.view_args['filename']):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            # Unhashed (or outdated) URLs keep working but must revalidate
+            response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def compress_response(response):
+    """Compress text responses for clients that accept it.
+
+    Each distinct body is compressed once: results are cached by content
+    hash, and static files use their build-time .br/.gz copies when present.
+    Media that is compressed already, small bodies and partial content pass
+    through unchanged.
+    """
+    if response.status_code == 304:
+        # A revalidated body may have come compressed; caches must still key it by encoding
+        response.vary.add('Accept-Encoding')
+        return response
+    if (response.status_code != 200 or response.content_encoding or not is_compressible(response.mimetype)
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+    static_path = None
+    if request.endpoint == 'static':
+        static_path = safe_join(current_app.static_folder, request.view_args['filename'])
+    elif response.is_streamed:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    sibling = static_path and precompressed_sibling(static_path, encoding)
+    if sibling:
+        with open(sibling, 'rb') as f:
+            body = f.read()
+    else:
+        if static_path:
+            with open(static_path, 'rb') as f:
+                data = f.read()
+        else:
+            data = response.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_BYTES']:
+            return response
+        key = (hashlib.sha1(data).digest(), encoding)
+        entry = compressed_bodies.get(key)
+        if entry is None:
+            entry = (compress(data, encoding),)
+            compressed_bodies.set(key, *entry)
+        body = entry[0]
+
+    if response.direct_passthrough:
+        # send_file()'s open file, replaced by the compressed body
+        response.response.close()
+        response.direct_passthrough = False
+    response.set_data(body)
+    response.content_encoding = encoding
+    etag, _ = response.get_etag()
+    if etag:
+        # Same entity, different bytes: only weak validators still match it
+        response.set_etag(etag, weak=True)
+    return response
+
+def pull_lang(endpoint, values):
+    """Move the language prefix out of the view arguments into g"""
+    if values and 'lang' in values:
+        g.lang = values.pop('lang')
+
+def default_lang(endpoint, values):
+    """url_for() on a localized endpoint stays in the current language unless given another"""
+    if 'lang' not in values and current_app.url_map.is_endpoint_expecting(endpoint, 'lang'):
+        values['lang'] = get_lang()
+
+def query_args(view_args):
+    """The request's query string for url_for(), minus keys it would read as `view_args`, lang or its _options"""
+    return {key: values for key, values in request.args.to_dict(flat=False).items()
+            if key not in view_args and key != 'lang' and not key.startswith('_')}
+
+def lang_url(lang, external=False):
+    """URL of the current page in `lang`, or of the home page where the current one is not localized"""
+    if request.endpoint and current_app.url_map.is_endpoint_expecting(request.endpoint, 'lang'):
+        url = url_for(request.endpoint, **request.view_args, **query_args(request.view_args), lang=lang)
+    else:
+        url = url_for('home', lang=lang)
+    if external:
+        url = (current_app.config['SITE_URL'] or request.host_url).rstrip('/') + url
+    return url
+
+def public_cache_headers(response):
+    """Localized pages are the same for every visitor, so shared caches may keep them.
+
+    Responses that read or wrote the session (flash messages) stay private.
+    """
+    if 'lang' not in g or request.method not in ('GET', 'HEAD') or 'Cache-Control' in response.headers:
+        return response
+    if session.accessed or session.modified:
+        response.headers['Cache-Control'] = 'private, no-store'
+    elif response.status_code in (200, 304):
+        response.headers['Cache-Control'] = current_app.config['PUBLIC_CACHE_CONTROL']
+    return response
 
-@app.context_processor
 def inject_globals():
+    lang = get_lang()
     return {
-        'lang': get_lang(),
-        't': get_translations(),
-        'config': app.config,
+        'lang': lang,
+        't': translations[lang],
+        'languages': list(translations),
+        'default_lang': DEFAULT_LANG,
+        'lang_url': lang_url,
+        'config': current_app.config,
         'current_year': datetime.now().year
     }
 
 # ============== PUBLIC ROUTES ==============
 
-@app.route('/')
+@cached_page
 def home():
-    featured = Painting.query.filter_by(is_featured=True, is_available=True).order_by(Painting.order).limit(6).all()
-    if not featured:
-        featured = Painting.query.filter_by(is_available=True).order_by(Painting.order).limit(6).all()
-    return render_template('pages/home.html', paintings=featured)
+    return render_template('pages/home.html', paintings=home_paintings())
 
-@app.route('/gallery')
+@cached_page
 def gallery():
     filter_type = request.args.get('filter', 'all')
-    
-    query = Painting.query.filter_by(is_available=True)
-    
-    if filter_type == 'available':
-        query = query.filter_by(is_sold=False)
-    elif filter_type == 'sold':
-        query = query.filter_by(is_sold=True)
-    
-    paintings = query.order_by(Painting.order, Painting.created_at.desc()).all()
-    return render_template('pages/gallery.html', paintings=paintings, current_filter=filter_type)
+    paintings, next_cursor = gallery_page(filter_type, request.args.get('cursor'))
+    return render_template('pages/gallery.html', paintings=paintings, current_filter=filter_type,
+                           next_cursor=next_cursor)
 
-@app.route('/painting/<int:painting_id>')
+@cached_page
+def gallery_more():
+    """Next batch of gallery cards as an HTML fragment, for incremental loading"""
+    filter_type = request.args.get('filter', 'all')
+    paintings, next_cursor = gallery_page(filter_type, request.args.get('cursor'))
+    return jsonify({
+        'html': render_template('partials/painting_cards.html', paintings=paintings),
+        'next': url_for('gallery_more', filter=filter_type, cursor=next_cursor) if next_cursor else None,
+        'next_page': url_for('gallery', filter=filter_type, cursor=next_cursor) if next_cursor else None,
+    })
+
+@cached_page
 def painting_detail(painting_id):
-    painting = Painting.query.get_or_404(painting_id)
-    other_paintings = Painting.query.filter(
-        Painting.id != painting_id,
-        Painting.is_available == True
-    ).order_by(Painting.order).limit(4).all()
-    return render_template('pages/painting.html', painting=painting, other_paintings=other_paintings)
-
-@app.route('/about')
+    painting = catalog().get(painting_id)
+    if painting is None:
+        abort(404)
+    return render_template('pages/painting.html', painting=painting, other_paintings=related_paintings(painting_id))
+
+@cached_page
+def search():
+    query = request.args.get('q', '').strip()
+    paintings = search_paintings(query)
+    return render_template('pages/search.html', paintings=paintings, query=query)
+
+@cached_page
+def api_search():
+    lang = request.args.get('lang', get_lang())
+    if lang not in translations:
+        abort(400)
+    paintings = search_paintings(request.args.get('q', ''))
+    return jsonify({'results': [{
+        'id': painting.id,
+        'title': painting.get_title(lang),
+        'technique': painting.get_technique(lang),
+        'year': painting.year,
+        'is_sold': painting.is_sold,
+        'url': url_for('painting_detail', lang=lang, painting_id=painting.id),
+        'image': url_for('static', filename='images/paintings/' + painting.image) if painting.image else None,
+    } for painting in paintings]})
+
+# Fields of /api/paintings, in output order; ?fields= picks a subset
+API_FIELDS = ('id', 'title', 'description', 'technique', 'year', 'width_cm', 'height_cm', 'price', 'is_sold',
+              'is_featured', 'url', 'image', 'image_width', 'image_height', 'color', 'placeholder', 'renditions')
+
+def api_lang():
+    lang = request.args.get('lang', DEFAULT_LANG)
+    if lang not in translations:
+        abort(400)
+    return lang
+
+def api_fields():
+    """Fields requested with ?fields=id,title,...; all of API_FIELDS by default"""
+    requested = request.args.get('fields')
+    if requested is None:
+        return API_FIELDS
+    fields = set(requested.split(','))
+    if not fields.issubset(API_FIELDS):
+        abort(400)
+    return [name for name in API_FIELDS if name in fields]
+
+def static_image_url(filename):
+    return url_for('static', filename='images/paintings/' + filename, _external=True)
+
+def serialize_painting(painting, lang, fields):
+    """API representation of a painting in `lang`, restricted to `fields`"""
+    values = {
+        'id': painting.id,
+        'title': painting.get_title(lang),
+        'description': painting.get_description(lang),
+        'technique': painting.get_technique(lang),
+        'year': painting.year,
+        'width_cm': painting.width,
+        'height_cm': painting.height,
+        # USD; like the site, sold works have no price
+        'price': None if painting.is_sold else painting.price,
+        'is_sold': painting.is_sold,
+        'is_featured': painting.is_featured,
+        'url': url_for('painting_detail', lang=lang, painting_id=painting.id, _external=True),
+        'image': static_image_url(painting.image) if painting.image else None,
+        'image_width': painting.image_width,
+        'image_height': painting.image_height,
+        'color': painting.dominant_color,
+        'placeholder': painting.placeholder,
+        'renditions': {fmt: [[width, static_image_url(f'{RENDITION_DIR}/{name}')] for width, name in entries]
+                       for fmt, entries in painting.get_renditions().items()},
+    }
+    return {name: values[name] for name in fields}
+
+@cached_api
+def api_paintings():
+    """Public catalog for partner sites and apps.
+
+    ?lang= picks the language, ?fields= a subset of API_FIELDS, ?filter= works
+    as in the gallery; ?cursor= comes from the previous page's "next" URL.
+    """
+    lang, fields = api_lang(), api_fields()
+    filter_type = request.args.get('filter', 'all')
+    limit = request.args.get('limit', str(current_app.config['GALLERY_PAGE_SIZE']))
+    if filter_type not in GALLERY_FILTERS or not limit.isdigit():
+        abort(400)
+    limit = int(limit)
+    if not 1 <= limit <= current_app.config['API_PAGE_MAX']:
+        abort(400)
+    paintings, next_cursor = gallery_page(filter_type, request.args.get('cursor'), limit)
+    return {
+        'results': [serialize_painting(painting, lang, fields) for painting in paintings],
+        'next': url_for('api_paintings', **query_args({'cursor'}), cursor=next_cursor, lang=lang, _external=True)
+                if next_cursor else None,
+    }
+
+@cached_api
+def api_painting(painting_id):
+    """One painting, as in /api/paintings"""
+    painting = catalog().get(painting_id)
+    if painting is None:
+        abort(404)
+    return serialize_painting(painting, api_lang(), api_fields())
+
+@cached_page
 def about():
     return render_template('pages/about.html')
 
-@app.route('/contact', methods=['GET', 'POST'])
 def contact():
-    painting_id = request.args.get('painting')
-    painting = None
-    if painting_id:
-        painting = Painting.query.get(painting_id)
+    painting = catalog().get(request.args.get('painting', type=int))
     
     if request.method == 'POST':
-        msg = ContactMessage(
+        # Concurrent submissions are grouped into one transaction; wait for ours to commit
+        message_batcher.submit(dict(
             name=request.form.get('name'),
             email=request.form.get('email'),
             phone=request.form.get('phone'),
-            painting_id=request.form.get('painting_id') or None,
+            painting_id=request.form.get('painting_id', type=int),
             message=request.form.get('message')
-        )
-        db.session.add(msg)
-        db.session.commit()
+        )).result(timeout=30)
         flash(get_translations()['message_sent'], 'success')
         return redirect(url_for('contact'))
     
     return render_template('pages/contact.html', painting=painting)
 
-@app.route('/set-lang/<lang>')
-def set_lang(lang):
-    if lang in ['uk', 'en', 'ru']:
-        session['lang'] = lang
-    return redirect(request.referrer or url_for('home'))
-
-# ============== ADMIN ROUTES ==============
-
-@app.route('/studio/login', methods=['GET', 'POST'])
-def admin_login():
-    if current_user.is_authenticated:
-        return redirect(url_for('admin_dashboard'))
-    
-    if request.method == 'POST':
-        username = request.form.get('username')
-        password = request.form.get('password')
-        admin = Admin.query.filter_by(username=username).first()
-        
-        if admin and admin.check_password(password):
-            login_user(admin)
-            return redirect(url_for('admin_dashboard'))
-        flash('Невірний логін або пароль', 'error')
-    
-    return render_template('admin/login.html')
-
-@app.route('/studio/logout')
-@login_required
-def admin_logout():
-    logout_user()
-    return redirect(url_for('home'))
-
-@app.route('/studio')
-@login_required
-def admin_dashboard():
-    paintings_count = Painting.query.count()
-    available_count = Painting.query.filter_by(is_sold=False, is_available=True).count()
-    sold_count = Painting.query.filter_by(is_sold=True).count()
-    messages_count = ContactMessage.query.filter_by(is_read=False).count()
-    recent_messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).limit(5).all()
-    return render_template('admin/dashboard.html', 
-                         paintings_count=paintings_count,
-                         available_count=available_count,
-                         sold_count=sold_count,
-                         messages_count=messages_count,
-                         recent_messages=recent_messages)
-
-@app.route('/studio/paintings')
-@login_required
-def admin_paintings():
-    paintings = Painting.query.order_by(Painting.order, Painting.created_at.desc()).all()
-    return render_template('admin/paintings.html', paintings=paintings)
-
-@app.route('/studio/paintings/add', methods=['GET', 'POST'])
-@login_required
-def admin_add_painting():
-    if request.method == 'POST':
-        painting = Painting(
-            title_uk=request.form.get('title_uk'),
-            title_en=request.form.get('title_en'),
-            title_ru=request.form.get('title_ru'),
-            description_uk=request.form.get('description_uk'),
-            description_en=request.form.get('description_en'),
-            description_ru=request.form.get('description_ru'),
-            width=int(request.form.get('width')) if request.form.get('width') else None,
-            height=int(request.form.get('height')) if request.form.get('height') else None,
-            year=int(request.form.get('year')) if request.form.get('year') else None,
-            technique_uk=request.form.get('technique_uk') or 'Олія на полотні',
-            technique_en=request.form.get('technique_en') or 'Oil on canvas',
-            technique_ru=request.form.get('technique_ru') or 'Масло на холсте',
-            price=float(request.form.get('price')) if request.form.get('price') else None,
-            is_sold=request.form.get('is_sold') == 'on',
-            is_featured=request.form.get('is_featured') == 'on',
-            order=int(request.form.get('order')) if request.form.get('order') else 0
-        )
-        
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                # Add timestamp to avoid duplicates
-                name, ext = os.path.splitext(filename)
-                filename = f"{name}_{int(datetime.now().timestamp())}{ext}"
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                painting.image = filename
-        
-        db.session.add(painting)
+def insert_messages(app, rows):
+    """Insert a batch of contact messages in one transaction (runs on the batcher thread)"""
+    with app.app_context():
+        db.session.add_all([ContactMessage(**row) for row in rows])
         db.session.commit()
-        flash('Картину додано!', 'success')
-        return redirect(url_for('admin_paintings'))
-    
-    return render_template('admin/painting_form.html', painting=None)
 
-@app.route('/studio/paintings/edit/<int:painting_id>', methods=['GET', 'POST'])
-@login_required
-def admin_edit_painting(painting_id):
-    painting = Painting.query.get_or_404(painting_id)
-    
-    if request.method == 'POST':
-        painting.title_uk = request.form.get('title_uk')
-        painting.title_en = request.form.get('title_en')
-        painting.title_ru = request.form.get('title_ru')
-        painting.description_uk = request.form.get('description_uk')
-        painting.description_en = request.form.get('description_en')
-        painting.description_ru = request.form.get('description_ru')
-        painting.width = int(request.form.get('width')) if request.form.get('width') else None
-        painting.height = int(request.form.get('height')) if request.form.get('height') else None
-        painting.year = int(request.form.get('year')) if request.form.get('year') else None
-        painting.technique_uk = request.form.get('technique_uk')
-        painting.technique_en = request.form.get('technique_en')
-        painting.technique_ru = request.form.get('technique_ru')
-        painting.price = float(request.form.get('price')) if request.form.get('price') else None
-        painting.is_sold = request.form.get('is_sold') == 'on'
-        painting.is_featured = request.form.get('is_featured') == 'on'
-        painting.order = int(request.form.get('order')) if request.form.get('order') else 0
-        
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                name, ext = os.path.splitext(filename)
-                filename = f"{name}_{int(datetime.now().timestamp())}{ext}"
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                painting.image = filename
-        
-        db.session.commit()
-        flash('Картину оновлено!', 'success')
-        return redirect(url_for('admin_paintings'))
-    
-    return render_template('admin/painting_form.html', painting=painting)
+def start_job_dispatcher():
+    job_queue.start()
 
-@app.route('/studio/paintings/delete/<int:painting_id>', methods=['POST'])
-@login_required
-def admin_delete_painting(painting_id):
-    painting = Painting.query.get_or_404(painting_id)
-    db.session.delete(painting)
-    db.session.commit()
-    flash('Картину видалено!', 'success')
-    return redirect(url_for('admin_paintings'))
-
-@app.route('/studio/messages')
-@login_required
-def admin_messages():
-    messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).all()
-    return render_template('admin/messages.html', messages=messages)
-
-@app.route('/studio/messages/mark-read/<int:message_id>', methods=['POST'])
-@login_required
-def admin_mark_read(message_id):
-    msg = ContactMessage.query.get_or_404(message_id)
-    msg.is_read = True
-    db.session.commit()
-    return jsonify({'success': True})
+def painting_image(painting_id, width, ext):
+    """Painting image resized on first request, then served from the disk cache"""
+    fmt = resize_formats().get(ext)
+    if fmt is None:
+        abort(404)
+    snapped = snap_width(width)
+    if snapped != width:
+        # One canonical URL per size keeps browser, CDN and disk caches from splintering
+        return redirect(url_for('painting_image', painting_id=painting_id, width=snapped, ext=ext), 308)
+    painting = catalog().get(painting_id)
+    if painting is None or not painting.image:
+        abort(404)
+    source = os.path.join(current_app.config['UPLOAD_FOLDER'], painting.image)
+    if not os.path.exists(source):
+        abort(404)
+    name = f"{os.path.splitext(painting.image)[0]}-{width}.{ext}"
+    path = image_cache.fetch(name, lambda out_path: resize_image(source, width, fmt, out_path))
+    # conditional=True answers If-None-Match / If-Modified-Since and Range requests
+    return send_file(path, mimetype=f'image/{fmt}', conditional=True, max_age=current_app.config['IMAGE_MAX_AGE'])
 
-@app.route('/studio/messages/delete/<int:message_id>', methods=['POST'])
-@login_required
-def admin_delete_message(message_id):
-    msg = ContactMessage.query.get_or_404(message_id)
-    db.session.delete(msg)
-    db.session.commit()
-    flash('Повідомлення видалено!', 'success')
-    return redirect(url_for('admin_messages'))
+def redirect_to_lang(endpoint, **kwargs):
+    """Send a URL from before language prefixes to its prefixed form, in the visitor's language"""
+    url = url_for(endpoint, **kwargs, **query_args(kwargs), lang=preferred_lang())
+    response = redirect(url, 307 if request.method == 'POST' else 302)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.update(('Cookie', 'Accept-Language'))
+    return response
+
+def set_lang(code):
+    """Old language switcher links: the referring page in language `code`"""
+    if code not in translations:
+        abort(404)
+    referrer = urlsplit(request.referrer or '')
+    segments = referrer.path.split('/')
+    if referrer.netloc == request.host and len(segments) > 1 and segments[1] in translations:
+        segments[1] = code
+        return redirect(urlunsplit(('', '', '/'.join(segments), referrer.query, '')))
+    return redirect(url_for('home', lang=code))
 
 # ============== INIT ==============
 
-def init_db():
+def init_db(app):
     with app.app_context():
-        db.create_all()
-        
         # Create admin if not exists
         if not Admin.query.filter_by(username='admin').first():
             admin = Admin(username='admin')
@@ -468,7 +563,618 @@ def init_db():
             db.session.add(admin)
             db.session.commit()
 
+@click.command('migrate')
+@with_appcontext
+def migrate_command():
+    """Create missing tables and apply pending schema migrations; run on every deploy"""
+    engine = db.engine
+    # Opening the engine upgrades the schema already (setup_engine)
+    applied = current_app.extensions.get('schema_migrations', []) + upgrade_schema(engine)
+    for version, description in applied:
+        print(f"{version}: {description}")
+    if not applied:
+        print("Schema is up to date")
+
+def public_and_admin_urls():
+    """One URL per route shape, used to exercise every query the site issues"""
+    painting = Painting.query.order_by(Painting.id).first()
+    urls = [url_for('home'), url_for('about'), url_for('gallery'),
+            url_for('gallery', filter='available'), url_for('gallery', filter='sold')]
+    if painting:
+        urls += [url_for('gallery', cursor=painting_cursor(painting)),
+                 url_for('gallery_more', filter='sold', cursor=painting_cursor(painting)),
+                 url_for('painting_detail', painting_id=painting.id),
+                 url_for('contact', painting=painting.id),
+                 url_for('search', q=painting.title_en),
+                 url_for('api_paintings', cursor=painting_cursor(painting)),
+                 url_for('api_painting', painting_id=painting.id),
+                 url_for('admin.edit_painting', painting_id=painting.id)]
+    urls += [url_for('contact'), url_for('admin.dashboard'), url_for('admin.paintings'), url_for('admin.messages')]
+    return urls
+
+def run_outside_app_context(fn, *args):
+    """Call fn(*args) on a separate thread, wait for it and re-raise its exception.
+
+    Test-client requests made from a CLI command would all share the command's
+    app context; on another thread each request gets its own context, g and
+    session. `fn` cannot use current_app.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            fn(*args)
+        except BaseException as exc:
+            outcome['error'] = exc
+
+    worker = threading.Thread(target=target)
+    worker.start()
+    worker.join()
+    if 'error' in outcome:
+        raise outcome['error']
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """Run every route and report the query plan of each SQL statement it issues"""
+    app = current_app._get_current_object()
+    cache = app.extensions['page_cache']
+    statements = []
+    plans = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+    
+    def run(urls, user_id):
+        client = app.test_client()
+        if user_id:
+            with client.session_transaction() as sess:
+                sess['_user_id'] = str(user_id)
+        for url in urls:
+            cache.clear()
+            del statements[:]
+            status = client.get(url).status_code
+            unique = {}
+            for statement, parameters in statements:
+                unique.setdefault(statement, parameters)
+            plans.append((url, status, list(unique.items())))
+    
+    admin = Admin.query.first()
+    with app.test_request_context():
+        urls = public_and_admin_urls()
+        # The studio shows the whole catalog by design (painting list, inbox filter)
+        studio = url_for('admin.dashboard')
+    # The catalog snapshot reads the whole catalog once per version, not per request
+    catalog_snapshots.get(db.session)
+    engine = db.engine
+    # Reads go through the separate read engine, so listen on both
+    engines = [engine, app_read_engine(engine)]
+    for listened in engines:
+        db.event.listen(listened, 'before_cursor_execute', capture)
+    try:
+        run_outside_app_context(run, urls, admin.id if admin else None)
+    finally:
+        for listened in engines:
+            db.event.remove(listened, 'before_cursor_execute', capture)
+    
+    scans = 0
+    with engine.connect() as conn:
+        for url, status, queries in plans:
+            print(f"{url} [{status}]")
+            for statement, parameters in queries:
+                for detail in explain(conn, statement, parameters):
+                    flag = 'ok'
+                    if is_table_scan(detail):
+                        flag = 'FULL SCAN'
+                        # Walking an index in ORDER BY order stops after the LIMIT's rows
+                        if ' INDEX ' in detail and 'LIMIT' in statement.upper().split():
+                            flag = 'LIMITED'
+                        elif url.startswith(studio) and detail.split()[1] == 'painting':
+                            flag = 'LISTING'
+                    scans += flag == 'FULL SCAN'
+                    print(f"    {flag:9} {detail}")
+    print(f"{scans} full table scan(s)")
+    if scans:
+        raise SystemExit(1)
+
+@click.command('build-renditions')
+@with_appcontext
+def build_renditions_command():
+    """Generate responsive renditions for paintings that have none yet"""
+    paintings = Painting.query.filter(Painting.image.isnot(None), Painting.image != '', Painting.renditions.is_(None)).all()
+    for painting in paintings:
+        painting.renditions = json.dumps(build_renditions(current_app.config['UPLOAD_FOLDER'], painting.image))
+        print(f"{painting.image}: done")
+    bump_catalog_version()
+    db.session.commit()
+
+@click.command('build-previews')
+@with_appcontext
+def build_previews_command():
+    """Record dimensions, dominant colour and placeholder for paintings that have none yet"""
+    paintings = Painting.query.filter(Painting.image.isnot(None), Painting.image != '', Painting.placeholder.is_(None)).all()
+    previews = {}
+    for painting in paintings:
+        if painting.image not in previews:
+            try:
+                previews[painting.image] = image_preview(current_app.config['UPLOAD_FOLDER'], painting.image)
+            except FileNotFoundError:
+                print(f"{painting.image}: missing, skipped")
+                previews[painting.image] = None
+            else:
+                print(f"{painting.image}: done")
+        painting.set_preview(previews[painting.image])
+    bump_catalog_version()
+    db.session.commit()
+
+@click.command('build-similarity')
+@click.option('--all', 'recompute', is_flag=True, help='Recompute features of every image, not only missing ones')
+@with_appcontext
+def build_similarity_command(recompute):
+    """Compute image features where missing and rebuild the similar works index"""
+    query = Painting.query.filter(Painting.image.isnot(None), Painting.image != '')
+    if not recompute:
+        query = query.filter(Painting.features.is_(None))
+    features = {}
+    for painting in query.order_by(Painting.id):
+        if painting.image not in features:
+            try:
+                features[painting.image] = json.dumps(image_features(current_app.config['UPLOAD_FOLDER'], painting.image))
+            except FileNotFoundError:
+                print(f"{painting.image}: missing, skipped")
+                features[painting.image] = None
+        painting.features = features[painting.image]
+    print(f"{sum(f is not None for f in features.values())} image(s) analysed, "
+          f"{rebuild_similar_paintings()} neighbour row(s) written")
+    bump_catalog_version()
+    db.session.commit()
+
+@click.command('gc-uploads')
+@click.option('--dry-run', is_flag=True, help='List orphaned files without deleting them')
+@click.option('--grace', default=3600, show_default=True, help='Keep files modified within this many seconds')
+@with_appcontext
+def gc_uploads_command(dry_run, grace):
+    """Delete uploaded images and renditions that no painting references"""
+    referenced = set()
+    for image, renditions in db.session.query(Painting.image, Painting.renditions):
+        if image:
+            referenced.add(image)
+        for entries in (json.loads(renditions) if renditions else {}).values():
+            referenced.update(f"{RENDITION_DIR}/{name}" for _, name in entries)
+    orphans = find_orphans(current_app.config['UPLOAD_FOLDER'], referenced, grace)
+    freed = 0
+    for relative in orphans:
+        path = os.path.join(current_app.config['UPLOAD_FOLDER'], relative)
+        freed += os.path.getsize(path)
+        if not dry_run:
+            os.remove(path)
+        print(relative)
+    verb = 'would free' if dry_run else 'freed'
+    print(f"{len(orphans)} orphaned file(s), {verb} {freed / 1024 / 1024:.1f} MB")
+
+# catalog_io.FORMATS, spelled out so the --format choices need no import at startup
+CATALOG_FORMATS = ('csv', 'jsonl')
+
+def painting_records(path, fmt, images_dir):
+    """Yield (line number, Painting column values or the RecordError) for each record of a catalog file"""
+    from admin import ALLOWED_EXTENSIONS
+    from catalog_io import RecordError, read_records, validate_painting
+    for line_number, record in read_records(path, fmt):
+        try:
+            yield line_number, validate_painting(record, images_dir, ALLOWED_EXTENSIONS)
+        except RecordError as exc:
+            yield line_number, exc
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+@click.command('import-catalog')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(CATALOG_FORMATS), help='Default: from the file extension')
+@click.option('--images-dir', type=click.Path(exists=True, file_okay=False),
+              help="Folder the image paths are relative to (default: the file's folder)")
+@click.option('--batch-size', default=200, show_default=True, help='Paintings per transaction')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Processes ingesting images')
+@click.option('--dry-run', is_flag=True, help='Only validate the file')
+@click.option('--skip-invalid', is_flag=True, help='Import the valid records even if others are not')
+@with_appcontext
+def import_catalog_command(path, fmt, images_dir, batch_size, workers, dry_run, skip_invalid):
+    """Add paintings from a CSV or JSONL file, storing and processing their images"""
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    from catalog_io import RecordError, detect_format, ingest_image
+    try:
+        fmt = detect_format(path, fmt)
+    except ValueError as exc:
+        raise click.UsageError(str(exc))
+    images_dir = images_dir or os.path.dirname(os.path.abspath(path))
+
+    # First pass: nothing is written unless the whole file is usable (or --skip-invalid)
+    valid = invalid = 0
+    for line_number, values in painting_records(path, fmt, images_dir):
+        if isinstance(values, RecordError):
+            invalid += 1
+            print(f"{path}:{line_number}: {values}")
+        else:
+            valid += 1
+    print(f"{valid} valid, {invalid} invalid record(s)")
+    if dry_run:
+        return
+    if invalid and not skip_invalid:
+        raise click.ClickException('nothing imported; fix the records above or pass --skip-invalid')
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    records = ((line_number, values) for line_number, values in painting_records(path, fmt, images_dir)
+               if not isinstance(values, RecordError))
+    ingested = {}  # source path -> ingest_image() result, or None if it failed
+    imported = 0
+    # spawn, as in jobs.py; decoding and resizing whole images keeps each worker on a CPU
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        for batch in batched(records, batch_size):
+            sources = {values['image_path'] for _, values in batch if values['image_path']} - set(ingested)
+            futures = {source: pool.submit(ingest_image, source, upload_folder) for source in sorted(sources)}
+            for source, future in futures.items():
+                try:
+                    ingested[source] = future.result()
+                except Exception as exc:
+                    print(f"{source}: {exc!r}")
+                    ingested[source] = None
+
+            paintings = []
+            for line_number, values in batch:
+                source = values.pop('image_path')
+                painting = Painting(**values)
+                if source:
+                    result = ingested[source]
+                    if result is None:
+                        print(f"{path}:{line_number}: skipped, its image could not be processed")
+                        continue
+                    painting.image = result['image']
+                    painting.renditions = json.dumps(result['renditions'])
+                    painting.set_preview(result['preview'])
+                    painting.features = json.dumps(result['features'])
+                paintings.append(painting)
+            # One transaction per batch; the mapper events keep the dashboard counters right
+            db.session.add_all(paintings)
+            bump_catalog_version()
+            db.session.commit()
+            imported += len(paintings)
+            print(f"  {imported} imported")
+
+    rebuild_similar_paintings()
+    bump_catalog_version()
+    db.session.commit()
+    print(f"{imported} painting(s) imported, {sum(r is not None for r in ingested.values())} image(s) processed")
+
+EXPORT_TABLES = {'paintings': Painting, 'messages': ContactMessage}
+
+@click.command('export-catalog')
+@click.argument('table', type=click.Choice(list(EXPORT_TABLES)))
+@click.option('--format', 'fmt', type=click.Choice(CATALOG_FORMATS), help='Default: from --output, else jsonl')
+@click.option('--output', default='-', show_default=True, help='File to write; - for stdout')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows fetched at a time')
+@with_appcontext
+def export_catalog_command(table, fmt, output, batch_size):
+    """Stream paintings (in import-catalog's format) or contact messages to CSV or JSONL"""
+    from catalog_io import PAINTING_FIELDS, detect_format, open_output, write_records
+    model = EXPORT_TABLES[table]
+    try:
+        fmt = fmt or (detect_format(output) if output != '-' else 'jsonl')
+    except ValueError as exc:
+        raise click.UsageError(str(exc))
+    if model is Painting:
+        # `image` is the stored file name: import with --images-dir set to the upload folder
+        columns = ('id', *PAINTING_FIELDS)
+    else:
+        columns = tuple(model.__table__.columns.keys())
+    statement = db.select(*(model.__table__.c[name] for name in columns)).order_by(model.__table__.c.id)
+    # yield_per fetches batch by batch instead of buffering the whole result
+    rows = db.session.execute(statement, execution_options={'yield_per': batch_size})
+    with open_output(output) as out:
+        count = write_records(rows, columns, out, fmt)
+    print(f"{count} {table} written to {output}", file=sys.stderr)
+
+@click.command('run-jobs')
+@with_appcontext
+def run_jobs_command():
+    """Run every due background job in this process, e.g. from cron on serverless hosts"""
+    print(f"{job_queue.run_pending()} job(s) run")
+
+def export_listings():
+    """Ordered painting ids of every listing a public page can show"""
+    listings = {'home': [p.id for p in home_paintings()]}
+    for painting_id in sorted(catalog().paintings):
+        listings[f'related:{painting_id}'] = [p.id for p in related_paintings(painting_id)]
+    for filter_type in GALLERY_FILTERS:
+        listings[f'gallery:{filter_type}'] = [p.id for p in gallery_page(filter_type)[0]]
+    return listings
+
+def export_pages(lang):
+    """(url, listings it shows, other paintings it shows) for every public page in `lang` worth serving statically"""
+    pages = [(url_for('home', lang=lang), ['home'], []), (url_for('about', lang=lang), [], []),
+             (url_for('contact', lang=lang), [], []), (url_for('gallery', lang=lang), ['gallery:all'], [])]
+    pages += [(url_for('gallery', lang=lang, filter=f), [f'gallery:{f}'], []) for f in ('available', 'sold')]
+    pages += [(url_for('painting_detail', lang=lang, painting_id=painting_id), [f'related:{painting_id}'], [painting_id])
+              for painting_id in sorted(catalog().paintings)]
+    return pages
+
+@click.command('export-static')
+@click.option('--full', is_flag=True, help='Re-render every page, ignoring the previous export')
+@with_appcontext
+def export_static_command(full):
+    """Render public pages in every language to static HTML, re-rendering only what changed"""
+    from static_export import ExportManifest, page_file, row_fingerprint, write_page, remove_page
+    app = current_app._get_current_object()
+    cache = app.extensions['page_cache']
+    folder = app.config['EXPORT_FOLDER']
+    manifest = ExportManifest(folder)
+    site_digest = hashlib.sha256(repr((
+        render_digest(), sources_digest(os.path.join(app.static_folder, 'css'), os.path.join(app.static_folder, 'js'),
+                                        extensions=('.css', '.js')),
+        datetime.now().year, app.config['SITE_URL'],
+    )).encode()).hexdigest()[:16]
+    columns = Painting.__table__.columns
+    fingerprints = {str(row[0]): row_fingerprint(tuple(row))
+                    for row in db.session.execute(db.select(*columns).order_by(Painting.id))}
+    changed_ids = manifest.changed_paintings(fingerprints)
+    listings = export_listings()
+    with app.test_request_context():
+        pages = [page for lang in translations for page in export_pages(lang)]
+
+    rendered, kept = {}, {}
+    def run():
+        client = app.test_client()
+        for url, page_listings, page_paintings in pages:
+            file = page_file(url)
+            if not full and not manifest.is_stale(file, site_digest, changed_ids, listings):
+                kept[file] = manifest.pages[file]
+                continue
+            cache.clear()
+            response = client.get(url)
+            if response.status_code != 200:
+                print(f"  {url}: {response.status_code}, skipped")
+                continue
+            write_page(folder, file, response.data)
+            # A page shows its own painting and those of its listings
+            shown = set(page_paintings).union(*(listings[name] for name in page_listings))
+            rendered[file] = {'url': url, 'paintings': sorted(shown), 'listings': page_listings}
+
+    run_outside_app_context(run)
+
+    pages_now = {**kept, **rendered}
+    removed = [file for file in manifest.pages if file not in pages_now]
+    for file in removed:
+        remove_page(folder, file)
+    manifest.save(site_digest, fingerprints, listings, pages_now)
+    print(f"{len(rendered)} page(s) rendered, {len(kept)} unchanged, {len(removed)} removed -> {folder}")
+
+@click.command('compile-translations')
+@with_appcontext
+def compile_translations_command():
+    """Compile translations/*.json into the binary catalog loaded at startup"""
+    catalogs = compile_catalogs(current_app.config['TRANSLATIONS_FOLDER'], current_app.config['TRANSLATIONS_COMPILED'])
+    print(f"{len(catalogs)} languages written to {current_app.config['TRANSLATIONS_COMPILED']}")
+
+# Scripts base.html inlines, minified by build-assets
+INLINE_SCRIPTS = ('js/site.js',)
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Minify the stylesheet and inline scripts, and extract each page's critical CSS (run before fingerprint-static)"""
+    from critical_css import critical_css
+    app = current_app._get_current_object()
+    with open(os.path.join(app.static_folder, AssetBundle.SOURCE_STYLESHEET), encoding='utf-8') as f:
+        css = minify_css(f.read())
+    stylesheet = 'css/style.min.css'
+    path = os.path.join(app.static_folder, stylesheet)
+    current = None
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            current = f.read()
+    # Rewriting unchanged output would only outdate its .br/.gz copies
+    if current != css:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(css)
+    scripts = {}
+    for filename in INLINE_SCRIPTS:
+        with open(os.path.join(app.static_folder, filename), encoding='utf-8') as f:
+            scripts[filename] = minify_js(f.read())
+
+    # One page per endpoint, rendered as visitors (and the studio's admin) see it
+    with app.test_request_context():
+        urls = [url_for('admin.login')] + public_and_admin_urls()
+    admin = Admin.query.first()
+    adapter = app.url_map.bind('localhost')
+    pages = {}
+
+    def run():
+        visitor, studio = app.test_client(), app.test_client()
+        if admin:
+            with studio.session_transaction() as sess:
+                sess['_user_id'] = str(admin.id)
+        for url in urls:
+            endpoint = adapter.match(urlsplit(url).path)[0]
+            if endpoint in pages:
+                continue
+            client = studio if endpoint.startswith('admin.') and endpoint != 'admin.login' else visitor
+            response = client.get(url)
+            if response.status_code == 200 and response.mimetype == 'text/html':
+                pages[endpoint] = critical_css(css, response.get_data(as_text=True))
+
+    run_outside_app_context(run)
+
+    asset_bundle.save(stylesheet, pages, scripts)
+    print(f"{stylesheet}: {len(css)} bytes")
+    for endpoint, page_css in sorted(pages.items()):
+        print(f"  {endpoint:24} {len(page_css):6} bytes critical")
+    print(f"{len(pages)} page(s) and {len(scripts)} script(s) written to {current_app.config['ASSET_BUNDLE']}")
+
+@click.command('fingerprint-static')
+@click.option('--precompress', is_flag=True, help='Also write .br/.gz copies of text assets for compress_response()')
+@with_appcontext
+def fingerprint_static_command(precompress):
+    """Hash every static file into the manifest used for cache-busting URLs"""
+    hashes = static_manifest.build()
+    print(f"{len(hashes)} files written to {current_app.config['STATIC_MANIFEST']}")
+    if precompress:
+        written, current = write_siblings(current_app.static_folder, current_app.config['COMPRESS_MIN_BYTES'])
+        print(f"{written} compressed copies written, {current} up to date")
+
+# ============== APP FACTORY ==============
+
+# Served under a language prefix: /en/gallery, /uk/painting/3
+LOCALIZED_ROUTES = [
+    ('/', home, ['GET']),
+    ('/gallery', gallery, ['GET']),
+    ('/gallery/more', gallery_more, ['GET']),
+    ('/painting/<int:painting_id>', painting_detail, ['GET']),
+    ('/search', search, ['GET']),
+    ('/about', about, ['GET']),
+    ('/contact', contact, ['GET', 'POST']),
+]
+
+PUBLIC_ROUTES = [
+    ('/api/search', api_search, ['GET']),
+    ('/api/paintings', api_paintings, ['GET']),
+    ('/api/paintings/<int:painting_id>', api_painting, ['GET']),
+    ('/img/<int:painting_id>/<int:width>.<ext>', painting_image, ['GET']),
+    ('/set-lang/<code>', set_lang, ['GET']),
+]
+
+CLI_COMMANDS = [migrate_command, check_query_plans_command, build_renditions_command, build_previews_command,
+                build_similarity_command, gc_uploads_command, import_catalog_command, export_catalog_command,
+                run_jobs_command, export_static_command, compile_translations_command, build_assets_command,
+                fingerprint_static_command]
+
+def create_app(config=None):
+    """Build the site; `config` overrides the defaults below.
+
+    Nothing here opens the database: engines are created and configured on
+    first use (see setup_engine), which also upgrades a schema left behind.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'kurevin-art-secret-key-2026'
+    # Overridable so generated catalogs (generate_catalog.py, benchmark.py) can run against their own files
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///kurevin.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Writes: few connections, each taking the write lock up front (see sqlite_concurrency)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 2, 'max_overflow': 2, 'pool_timeout': 30,
+                                               'connect_args': {'timeout': 5}}
+    # Reads: a larger pool of query_only connections on the same file
+    app.config['SQLITE_READ_ENGINE_OPTIONS'] = {'pool_size': 5, 'max_overflow': 10,
+                                                'connect_args': {'timeout': 5}}
+    app.config['SQLITE_PRAGMAS'] = DEFAULT_PRAGMAS
+    app.config['CONTACT_BATCH_MAX_SIZE'] = 100
+    app.config['CONTACT_BATCH_MAX_DELAY'] = 0.005  # seconds to wait for more messages to group
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'static/images/paintings')
+    app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024  # 32MB max
+    app.config['STATIC_MANIFEST'] = 'static-manifest.json'
+    app.config['ASSET_BUNDLE'] = 'asset-bundle.json'  # written by flask build-assets
+    # On-demand resizes (/img/...): requested widths snap up to one of these
+    app.config['IMAGE_WIDTHS'] = (160, 320, 480, 640, 960, 1280, 1600, 2048)
+    app.config['IMAGE_CACHE_FOLDER'] = os.path.join(app.instance_path, 'image-cache')
+    app.config['IMAGE_CACHE_MAX_BYTES'] = 512 * 1024 * 1024
+    app.config['IMAGE_MAX_AGE'] = 24 * 3600  # URLs are per painting, so revalidate by ETag after a day
+    app.config['PAGE_CACHE_MAX_BYTES'] = 16 * 1024 * 1024  # rendered public pages
+    app.config['COMPRESSED_CACHE_MAX_BYTES'] = 8 * 1024 * 1024  # compressed bodies by content hash
+    # Below this, compression saves less than it costs
+    app.config['COMPRESS_MIN_BYTES'] = 512
+    app.config['GALLERY_PAGE_SIZE'] = 24
+    # Seconds a process serves its catalog snapshot before checking the version again;
+    # catalog changes committed by the same process are picked up at once
+    app.config['CATALOG_CHECK_INTERVAL'] = 1.0
+    app.config['INBOX_PAGE_SIZE'] = 50
+    app.config['SEARCH_LIMIT'] = 48
+    app.config['API_PAGE_MAX'] = 100  # largest ?limit= of /api/paintings
+    app.config['INQUIRY_HISTORY'] = True  # per-painting daily inquiry counts for charts
+    # Background jobs: a pool process per web worker, reniced below the request threads.
+    # Serverless deployments (Vercel) have no process that outlives the request, so run jobs inline there.
+    app.config['JOB_MODE'] = 'inline' if os.environ.get('VERCEL') else 'pool'
+    app.config['JOB_WORKERS'] = 1
+    app.config['JOB_NICENESS'] = 10
+    app.config['JOB_MAX_ATTEMPTS'] = 3
+    app.config['JOB_RETRY_DELAY'] = 30  # seconds, doubled after each failed attempt
+    app.config['JOB_TIMEOUT'] = 600  # a job running this long is assumed lost and requeued
+    app.config['JOB_POLL_INTERVAL'] = 5
+    # /studio/metrics: Prometheus scrapers send "Authorization: Bearer <token>" instead of logging in
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['SLOW_REQUEST_MS'] = 500  # log slower requests with their SQL; None to disable
+    app.config['EXPORT_FOLDER'] = os.path.join(app.root_path, 'export')  # static pages for the CDN
+    app.config['TRANSLATIONS_FOLDER'] = os.path.join(app.root_path, 'translations')
+    app.config['TRANSLATIONS_COMPILED'] = os.path.join(app.root_path, 'translations', 'catalog.pickle')
+    # Localized pages carry no cookie, so browsers and CDNs may cache them; ETags make revalidation cheap
+    app.config['PUBLIC_CACHE_CONTROL'] = 'public, max-age=60, s-maxage=300'
+    # Origin for hreflang alternates, e.g. https://kurevin.art; defaults to the requested host
+    app.config['SITE_URL'] = os.environ.get('SITE_URL')
+    # Compiled templates outlive the process, so a new worker skips Jinja's parse and compile.
+    # Serverless functions can only write to the temp dir; None disables the cache.
+    app.config['TEMPLATE_CACHE_FOLDER'] = os.path.join(
+        tempfile.gettempdir() if os.environ.get('VERCEL') else app.instance_path, 'template-cache')
+
+    # Contact settings
+    app.config['CONTACT_EMAIL'] = 'kurevin.art@gmail.com'
+    app.config['CONTACT_PHONE'] = '+380501234567'
+    app.config['CONTACT_TELEGRAM'] = 'kurevin_art'
+    app.config.update(config or {})
+
+    db.init_app(app)
+    if app.config['TEMPLATE_CACHE_FOLDER']:
+        os.makedirs(app.config['TEMPLATE_CACHE_FOLDER'], exist_ok=True)
+        app.jinja_options = {**app.jinja_options,
+                             'bytecode_cache': FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_FOLDER'])}
+    app.extensions['translations'] = load_catalogs(app.config['TRANSLATIONS_FOLDER'], app.config['TRANSLATIONS_COMPILED'])
+    app.extensions['static_manifest'] = StaticManifest(app.static_folder, app.config['STATIC_MANIFEST'])
+    app.extensions['asset_bundle'] = AssetBundle(app.static_folder, app.config['ASSET_BUNDLE'])
+    app.extensions['page_cache'] = PageCache(app.config['PAGE_CACHE_MAX_BYTES'])
+    app.extensions['catalog_snapshots'] = CatalogSnapshots(app.config['CATALOG_CHECK_INTERVAL'])
+    app.extensions['compressed_bodies'] = PageCache(app.config['COMPRESSED_CACHE_MAX_BYTES'])
+    app.extensions['image_cache'] = DiskCache(app.config['IMAGE_CACHE_FOLDER'], app.config['IMAGE_CACHE_MAX_BYTES'])
+    app.extensions['metrics'] = Metrics()
+    instrument(app, app.extensions['metrics'], app.config['SLOW_REQUEST_MS'])
+    app.extensions['message_batcher'] = WriteBatcher(partial(insert_messages, app), app.config['CONTACT_BATCH_MAX_SIZE'],
+                                                     app.config['CONTACT_BATCH_MAX_DELAY'])
+    app.extensions['job_queue'] = JobQueue(app, db, Job)
+
+    app.add_template_filter(srcset_filter, 'srcset')
+    app.add_template_global(inline_critical_css, 'critical_css')
+    app.add_template_global(site_stylesheet)
+    app.add_template_global(inline_script)
+    app.url_defaults(fingerprint_static_url)
+    app.url_defaults(default_lang)
+    app.url_value_preprocessor(pull_lang)
+    app.after_request(static_cache_headers)
+    app.after_request(public_cache_headers)
+    app.after_request(compress_response)
+    app.context_processor(inject_globals)
+    app.before_request(start_job_dispatcher)
+    lang_prefix = f"/<any({', '.join(app.extensions['translations'])}):lang>"
+    for rule, view, methods in LOCALIZED_ROUTES:
+        app.add_url_rule(lang_prefix + rule, view_func=view, methods=methods)
+        # Bookmarks and search results from before the prefixes redirect once
+        app.add_url_rule(rule, f'legacy_{view.__name__}', partial(redirect_to_lang, view.__name__), methods=methods)
+    for rule, view, methods in PUBLIC_ROUTES:
+        app.add_url_rule(rule, view_func=view, methods=methods)
+
+    # The studio lives in its own module and brings its own login manager and job handlers
+    from admin import bp as admin_bp
+    app.register_blueprint(admin_bp)
+
+    for command in CLI_COMMANDS:
+        app.cli.add_command(command)
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    init_db()
+    init_db(app)
     app.run(debug=False, port=5001, host='0.0.0.0')
@@ -0,0 +1,179 @@
+"""
+Static assets - content-hashed URLs for long-lived caching, and the
+minified stylesheet, critical CSS and inline scripts of flask build-assets
+"""
+import hashlib
+import json
+import os
+import re
+
+from compression import SIBLING_SUFFIXES
+
+HASH_LENGTH = 12
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+class StaticManifest:
+    """Maps static filenames to content hashes.
+
+    Hashes come from a prebuilt manifest file when one exists; files missing
+    from it (e.g. new uploads) are hashed on first use and remembered.
+    """
+
+    def __init__(self, static_folder, manifest_path=None):
+        self.static_folder = static_folder
+        self.manifest_path = manifest_path
+        self.hashes = {}
+        if manifest_path and os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.hashes = json.load(f)
+
+    def get(self, filename):
+        digest = self.hashes.get(filename)
+        if digest is None:
+            path = os.path.join(self.static_folder, filename)
+            if not os.path.isfile(path):
+                return None
+            digest = self.hashes[filename] = file_digest(path)
+        return digest
+
+    def build(self):
+        """Hash every file under the static folder and write the manifest"""
+        hashes = {}
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                if name.endswith(tuple(SIBLING_SUFFIXES.values())):
+                    continue
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                hashes[filename] = file_digest(path)
+        self.hashes = hashes
+        if self.manifest_path:
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(hashes, f, indent=0, sort_keys=True)
+        return hashes
+
+
+_CSS_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|\s+|[^"\'/\s]+|/', re.S)
+# No space is needed after these, or before the second set
+_CSS_OPEN = set('{};,>:(')
+_CSS_CLOSE = set('{};,>)!')
+
+
+def minify_css(text):
+    """`text` without comments and optional whitespace; strings are kept as written"""
+    out = []
+    space = False
+    for token in _CSS_TOKEN.findall(text):
+        if token.startswith('/*') or token.isspace():
+            space = True
+            continue
+        if token[0] not in '"\'':
+            token = token.replace(';}', '}')
+            if token[0] == '}' and out and out[-1].endswith(';'):
+                out[-1] = out[-1][:-1]
+                if not out[-1]:
+                    out.pop()
+        if space and out and out[-1][-1] not in _CSS_OPEN and token[0] not in _CSS_CLOSE:
+            out.append(' ')
+        space = False
+        out.append(token)
+    return ''.join(out)
+
+
+_JS_TOKEN = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`|/\*.*?\*/|//[^\n]*'
+                       r'|\s+|[\w$]+|.', re.S)
+_JS_REGEX = re.compile(r'/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*')
+# A slash after one of these (or at the start) begins a regular expression, not a division
+_JS_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+# A newline after these, or before the second set, cannot end a statement
+_JS_CONTINUES = set('{(,;')
+_JS_CLOSES = set('}),;')
+
+
+def minify_js(text):
+    """`text` without comments, indentation or blank lines.
+
+    Line breaks are kept where they could end a statement, so the result
+    runs exactly as the source did without parsing it.
+    """
+    out = []
+    pending = ''
+    pos = 0
+    while pos < len(text):
+        last = out[-1][-1] if out else ''
+        match = None
+        if text[pos] == '/' and (not last or last in _JS_REGEX_AFTER) and not text.startswith(('//', '/*'), pos):
+            match = _JS_REGEX.match(text, pos)
+        match = match or _JS_TOKEN.match(text, pos)
+        token = match.group()
+        pos = match.end()
+        if token.startswith(('//', '/*')) or token.isspace():
+            if '\n' in token or token.startswith('//'):
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            continue
+        if pending and last:
+            if pending == '\n' and last not in _JS_CONTINUES and token[0] not in _JS_CLOSES:
+                out.append('\n')
+            elif ((last.isalnum() or last in '_$') and (token[0].isalnum() or token[0] in '_$')
+                  or last in '+-' and token[0] in '+-'):
+                out.append(' ')
+        pending = ''
+        out.append(token)
+    return ''.join(out)
+
+
+class AssetBundle:
+    """Output of flask build-assets, read at startup.
+
+    Holds the stylesheet to link, critical CSS by endpoint and minified
+    inline scripts. Without a build, pages link the source stylesheet and
+    inline scripts as written.
+    """
+
+    SOURCE_STYLESHEET = 'css/style.css'
+
+    def __init__(self, static_folder, path=None):
+        self.static_folder = static_folder
+        self.path = path
+        self.data = {}
+        self.digest = ''
+        if path and os.path.exists(path):
+            self.digest = file_digest(path)
+            with open(path, encoding='utf-8') as f:
+                self.data = json.load(f)
+        self.sources = {}
+
+    @property
+    def stylesheet(self):
+        return self.data.get('stylesheet', self.SOURCE_STYLESHEET)
+
+    def critical_css(self, endpoint):
+        return self.data.get('pages', {}).get(endpoint)
+
+    def script(self, filename):
+        """A static script's text for inlining: minified if built, else the source"""
+        text = self.data.get('scripts', {}).get(filename)
+        if text is None:
+            text = self.sources.get(filename)
+            if text is None:
+                with open(os.path.join(self.static_folder, filename), encoding='utf-8') as f:
+                    text = self.sources[filename] = f.read()
+        return text
+
+    def save(self, stylesheet, pages, scripts):
+        """Write the bundle; the same inputs always produce the same file"""
+        self.data = {'stylesheet': stylesheet, 'pages': pages, 'scripts': scripts}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=0, sort_keys=True)
+        self.digest = file_digest(self.path)
@@ -0,0 +1,167 @@
+"""
+Route benchmark - drives every page through the Flask test client
+
+    python benchmark.py --db /tmp/bench.db --output bench-<commit>.json
+    python benchmark.py --db /tmp/bench.db --compare bench-<older commit>.json
+
+For each URL it records latency percentiles, SQL statements per request and
+response size, both with the rendered-page cache cleared before every request
+(cold) and with it warm. --compare exits 1 when any p50 regresses beyond
+--threshold, so runs on two commits can gate a change.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', required=True, help='catalog built by generate_catalog.py')
+    parser.add_argument('--upload-folder', help='default: <db dir>/paintings')
+    parser.add_argument('--requests', type=int, default=30, help='timed requests per URL and mode')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--output', help='write results as JSON here')
+    parser.add_argument('--compare', help='earlier results to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='allowed p50 ratio against --compare')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='kurevin2026')
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+db_path = os.path.abspath(ARGS.db)
+if not os.path.exists(db_path):
+    sys.exit(f"{db_path} not found; build it with generate_catalog.py")
+# Must be set before app is imported: its engine and upload folder are fixed at import
+os.environ['DATABASE_URL'] = 'sqlite:///' + db_path
+os.environ['UPLOAD_FOLDER'] = os.path.abspath(ARGS.upload_folder or os.path.join(os.path.dirname(db_path), 'paintings'))
+
+import sqlalchemy as sa  # noqa: E402
+
+from app import app, db, public_and_admin_urls, Painting, ContactMessage, app_read_engine  # noqa: E402
+
+page_cache = app.extensions['page_cache']
+
+
+class QueryCounter:
+    """Counts statements issued by the benchmarking thread on both engines"""
+
+    def __init__(self, engines):
+        self.count = 0
+        self.thread = threading.get_ident()
+        for engine in engines:
+            sa.event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        # Ignore background threads (job dispatcher, write batcher)
+        if threading.get_ident() == self.thread:
+            self.count += 1
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def measure(client, url, cold):
+    timings, queries, sizes, statuses = [], [], [], set()
+    for i in range(ARGS.warmup + ARGS.requests):
+        if cold:
+            page_cache.clear()
+        before = COUNTER.count
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - started
+        if i < ARGS.warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(COUNTER.count - before)
+        sizes.append(len(response.data))
+        statuses.add(response.status_code)
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': percentile(queries, 50),
+        'bytes': percentile(sizes, 50),
+        'status': sorted(statuses),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run():
+    client = app.test_client()
+    response = client.post('/studio/login', data={'username': ARGS.username, 'password': ARGS.password})
+    if response.status_code != 302:
+        sys.exit('admin login failed; pass --username/--password')
+    with app.test_request_context():
+        urls = public_and_admin_urls()
+        catalog = {'paintings': Painting.query.count(), 'messages': ContactMessage.query.count()}
+
+    routes = {}
+    for url in urls:
+        routes[url] = {'cold': measure(client, url, cold=True), 'warm': measure(client, url, cold=False)}
+        cold, warm = routes[url]['cold'], routes[url]['warm']
+        print(f"{url[:60]:60} cold p50 {cold['p50_ms']:8.2f}ms p99 {cold['p99_ms']:8.2f}ms "
+              f"{cold['queries']:3} q {cold['bytes']:8} B | warm p50 {warm['p50_ms']:8.2f}ms")
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'requests': ARGS.requests,
+            'warmup': ARGS.warmup,
+            **catalog,
+        },
+        'routes': routes,
+    }
+
+
+def compare(results, baseline):
+    """Print p50 ratios against `baseline`; returns the number of regressions"""
+    regressions = 0
+    for url, modes in results['routes'].items():
+        for mode, stats in modes.items():
+            old = baseline['routes'].get(url, {}).get(mode)
+            if not old or not old['p50_ms']:
+                continue
+            ratio = stats['p50_ms'] / old['p50_ms']
+            flag = 'REGRESSED' if ratio > ARGS.threshold else 'ok'
+            regressions += flag != 'ok'
+            print(f"{flag:9} {mode:4} {url[:60]:60} {old['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f}ms "
+                  f"(x{ratio:.2f}), queries {old['queries']} -> {stats['queries']}")
+    return regressions
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        COUNTER = QueryCounter([db.engine, app_read_engine(db.engine)])
+    results = run()
+    if ARGS.output:
+        with open(ARGS.output, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {ARGS.output}")
+    if ARGS.compare:
+        with open(ARGS.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        print(f"{regressions} regression(s) beyond x{ARGS.threshold}")
+        if regressions:
+            sys.exit(1)
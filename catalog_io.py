@@ -0,0 +1,190 @@
+"""
+Bulk catalog files - streaming CSV/JSONL readers and writers, validation, and image ingestion
+
+    flask import-catalog paintings.csv --images-dir scans/
+    flask export-catalog paintings --output paintings.jsonl
+
+Records are read and written one at a time, so a file's size does not
+decide the memory an import or export needs. ingest_image() runs in a
+process pool; like the job handlers it takes and returns plain values.
+"""
+import csv
+from datetime import datetime
+import json
+import os
+import sys
+
+FORMATS = ('csv', 'jsonl')
+
+# Columns of a painting record, in file order; everything but the titles is optional
+PAINTING_FIELDS = (
+    'title_uk', 'title_en', 'title_ru', 'description_uk', 'description_en', 'description_ru',
+    'technique_uk', 'technique_en', 'technique_ru', 'width', 'height', 'year', 'price',
+    'is_sold', 'is_available', 'is_featured', 'order', 'image', 'created_at',
+)
+REQUIRED_FIELDS = ('title_uk', 'title_en', 'title_ru')
+INTEGER_FIELDS = ('width', 'height', 'year', 'order')
+BOOLEAN_FIELDS = ('is_sold', 'is_available', 'is_featured')
+# Written by export-catalog; ids are assigned anew on import
+IGNORED_FIELDS = ('id',)
+DEFAULTS = {
+    'technique_uk': 'Олія на полотні', 'technique_en': 'Oil on canvas', 'technique_ru': 'Масло на холсте',
+    'is_sold': False, 'is_available': True, 'is_featured': False, 'order': 0,
+}
+
+_TRUE = {'1', 'true', 'yes', 'y', 'on'}
+_FALSE = {'0', 'false', 'no', 'n', 'off'}
+
+
+class RecordError(ValueError):
+    """A record that cannot be imported; str() says which fields and why"""
+
+
+def detect_format(path, fmt=None):
+    """`fmt`, or the format implied by the file extension"""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt == 'jsonl' or fmt == 'ndjson':
+        return 'jsonl'
+    if fmt == 'csv':
+        return 'csv'
+    raise ValueError(f"unknown catalog format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def read_records(path, fmt):
+    """Yield (line number, record dict) from a CSV (with a header row) or JSONL file"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f, restkey='(cells beyond the header)')
+            for record in reader:
+                # Empty cells mean "not given", as a missing JSON key does
+                yield reader.line_num, {key: value for key, value in record.items() if value not in ('', None)}
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    yield line_number, RecordError(f"invalid JSON: {exc}")
+                    continue
+                yield line_number, record
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(value)
+
+
+def _integer(value):
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    return int(value)
+
+
+def validate_painting(record, images_dir, allowed_extensions):
+    """Column values for a new Painting from a file record; raises RecordError.
+
+    `image` is a path relative to `images_dir` (or absolute); the returned
+    values carry it as `image_path`, to be ingested before the row is added.
+    """
+    if isinstance(record, RecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise RecordError(f"not an object: {record!r}")
+    problems = []
+    unknown = set(record) - set(PAINTING_FIELDS) - set(IGNORED_FIELDS)
+    if unknown:
+        problems.append(f"unknown field(s) {', '.join(sorted(unknown))}")
+    values = dict(DEFAULTS)
+    for name in PAINTING_FIELDS:
+        value = record.get(name)
+        if value is None:
+            if name in REQUIRED_FIELDS:
+                problems.append(f"{name} is required")
+            continue
+        try:
+            if name in INTEGER_FIELDS:
+                value = _integer(value)
+            elif name in BOOLEAN_FIELDS:
+                value = _boolean(value)
+            elif name == 'price':
+                value = float(value)
+            elif name == 'created_at':
+                value = datetime.fromisoformat(str(value))
+            else:
+                value = str(value).strip()
+                if name in REQUIRED_FIELDS and not value:
+                    raise ValueError(value)
+        except (TypeError, ValueError):
+            problems.append(f"{name}: invalid value {value!r}")
+            continue
+        values[name] = value
+
+    image = values.pop('image', None)
+    values['image_path'] = None
+    if image:
+        path = os.path.join(images_dir, image)
+        ext = os.path.splitext(path)[1].lstrip('.').lower()
+        if ext not in allowed_extensions:
+            problems.append(f"image: unsupported file type {image!r}")
+        elif not os.path.isfile(path):
+            problems.append(f"image: {path} not found")
+        else:
+            values['image_path'] = os.path.abspath(path)
+    if problems:
+        raise RecordError('; '.join(problems))
+    return values
+
+
+def ingest_image(path, upload_folder):
+    """Pool task: store an image file and build everything the upload path would.
+
+    Returns {'image', 'renditions', 'preview', 'features'}; renditions as
+    returned by imaging.build_renditions.
+    """
+    from imaging import build_renditions, image_features, image_preview
+    from storage import store_stream
+    ext = os.path.splitext(path)[1]
+    with open(path, 'rb') as f:
+        filename = store_stream(f, upload_folder, ext)
+    return {
+        'image': filename,
+        'renditions': build_renditions(upload_folder, filename),
+        'preview': image_preview(upload_folder, filename),
+        'features': image_features(upload_folder, filename),
+    }
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def write_records(rows, columns, out, fmt):
+    """Write `rows` (tuples in `columns` order) to the open text file `out`; returns the count"""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([_json_value(value) for value in row])
+            count += 1
+    else:
+        for row in rows:
+            out.write(json.dumps({name: _json_value(value) for name, value in zip(columns, row)},
+                                 ensure_ascii=False))
+            out.write('\n')
+            count += 1
+    return count
+
+
+def open_output(path):
+    """Text file to write an export to; '-' is stdout"""
+    if path == '-':
+        return open(sys.stdout.fileno(), 'w', newline='', encoding='utf-8', closefd=False)
+    return open(path, 'w', newline='', encoding='utf-8')
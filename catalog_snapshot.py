@@ -0,0 +1,145 @@
+"""
+Catalog snapshot - the public catalog held in memory, read without the ORM
+
+Public pages read paintings from an immutable CatalogSnapshot: compact
+PaintingRecord objects plus the lists those pages show, already filtered
+and sorted. The process keeps one snapshot and replaces it whole when the
+catalog version moves, so a request sees one consistent catalog and never
+waits for the database. The version is read at most once per
+CATALOG_CHECK_INTERVAL; commits that bump it in this process are seen at
+once (see bump_catalog_version).
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta
+import json
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+
+from models import db, CatalogState, Painting, PaintingMixin, SimilarPainting
+from sqlite_concurrency import RoutingSession
+
+# Painting columns a public page or the API can show; features and the admin-only fields stay in the database
+RECORD_FIELDS = (
+    'id', 'title_uk', 'title_en', 'title_ru', 'description_uk', 'description_en', 'description_ru',
+    'width', 'height', 'year', 'technique_uk', 'technique_en', 'technique_ru', 'price', 'is_sold',
+    'is_available', 'is_featured', 'image', 'renditions', 'image_width', 'image_height', 'dominant_color',
+    'placeholder', 'created_at', 'order',
+)
+
+
+class PaintingRecord(PaintingMixin):
+    """Read-only copy of a painting row, with its renditions JSON decoded once"""
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, row):
+        for name in RECORD_FIELDS:
+            object.__setattr__(self, name, row[name])
+        object.__setattr__(self, 'renditions', json.loads(self.renditions) if self.renditions else {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self):
+        return f"<PaintingRecord {self.id}>"
+
+    def get_renditions(self):
+        return self.renditions
+
+
+def gallery_key(order, created_at, painting_id):
+    """Sort key of the gallery: by order, then newest first"""
+    micros = (created_at - datetime.min) // timedelta(microseconds=1) if created_at else -1
+    return (order or 0, -micros, -painting_id)
+
+
+class CatalogSnapshot:
+    """The catalog at one version, with the lists public pages show precomputed"""
+
+    def __init__(self, version, records, similar):
+        self.version = version
+        self.paintings = {record.id: record for record in records}
+        by_gallery = sorted(records, key=lambda p: gallery_key(p.order, p.created_at, p.id))
+        available = [p for p in by_gallery if p.is_available]
+        # gallery filter -> (records, their sort keys for cursor lookups)
+        self.galleries = {}
+        for filter_type, listed in (('all', available), ('available', [p for p in available if not p.is_sold]),
+                                    ('sold', [p for p in available if p.is_sold])):
+            self.galleries[filter_type] = (tuple(listed),
+                                           [gallery_key(p.order, p.created_at, p.id) for p in listed])
+        # By order alone, ties in gallery order (sorted() is stable)
+        self.available_by_order = tuple(sorted(available, key=lambda p: p.order or 0))
+        # Ties by id, as the featured index returned them
+        self.featured = tuple(sorted((p for p in available if p.is_featured), key=lambda p: (p.order or 0, p.id)))
+        self.similar = similar
+
+    @classmethod
+    def load(cls, session):
+        """Read the catalog in one transaction, so the version matches the rows"""
+        version = session.query(CatalogState.version).filter_by(id=1).scalar() or 0
+        columns = [Painting.__table__.c[name] for name in RECORD_FIELDS]
+        records = [PaintingRecord(row) for row in session.execute(db.select(*columns)).mappings()]
+        similar = {}
+        for painting_id, similar_id in session.execute(
+                db.select(SimilarPainting.painting_id, SimilarPainting.similar_id)
+                .order_by(SimilarPainting.painting_id, SimilarPainting.rank)):
+            similar.setdefault(painting_id, []).append(similar_id)
+        return cls(version, records, {painting_id: tuple(ids) for painting_id, ids in similar.items()})
+
+    def get(self, painting_id):
+        return self.paintings.get(painting_id)
+
+    def gallery_page(self, filter_type, after=None, limit=24):
+        """Up to `limit` records of a gallery listing after the (order, created_at, id) key `after`,
+        and whether more follow"""
+        listed, keys = self.galleries[filter_type]
+        start = bisect_right(keys, gallery_key(*after)) if after else 0
+        return listed[start:start + limit], len(listed) > start + limit
+
+
+class CatalogSnapshots:
+    """Holds the process's current snapshot and replaces it when the catalog version changes"""
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self.snapshot = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def fresh(self):
+        checked_at = self.checked_at
+        return checked_at is not None and time.monotonic() - checked_at < self.check_interval
+
+    def get(self, session):
+        """The current snapshot, rebuilt first if the catalog version has moved"""
+        if self.fresh():
+            return self.snapshot
+        with self.lock:
+            # Another thread may have checked while this one waited
+            if self.fresh():
+                return self.snapshot
+            checked_at = time.monotonic()
+            snapshot = self.snapshot
+            version = session.query(CatalogState.version).filter_by(id=1).scalar() or 0
+            if snapshot is None or snapshot.version != version:
+                snapshot = self.snapshot = CatalogSnapshot.load(session)
+            self.checked_at = checked_at
+            return snapshot
+
+    def invalidate(self):
+        """Check the version on next use (this process committed a catalog change)"""
+        self.checked_at = None
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def refresh_after_catalog_change(session):
+    if session.info.pop('catalog_changed', False):
+        snapshots = current_app.extensions.get('catalog_snapshots')
+        if snapshots is not None:
+            snapshots.invalidate()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_catalog_change(session):
+    session.info.pop('catalog_changed', None)
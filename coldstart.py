@@ -0,0 +1,165 @@
+"""
+Cold-start report - what a fresh process pays before it can answer a request
+
+    python coldstart.py
+    python coldstart.py --output coldstart-<commit>.json
+    python coldstart.py --compare coldstart-<older commit>.json
+
+Each run starts a new interpreter, as a serverless cold start does, and
+times `import app` and the first request after it. A separate run under
+python -X importtime lists the modules that import spends most time in.
+--compare exits 1 when the median import or first request regresses beyond
+--threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the child interpreter; prints one JSON line of timings
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+status = app.app.test_client().get(sys.argv[1]).status_code
+done = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'first_request_ms': (done - imported) * 1000,
+                  'status': status, 'modules': len(sys.modules)}))
+'''
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='SQLite file to run against (default: the app\'s own)')
+    parser.add_argument('--url', default='/uk/', help='first request after the import')
+    parser.add_argument('--runs', type=int, default=10, help='fresh processes to time')
+    parser.add_argument('--top', type=int, default=20, help='slowest imports to list')
+    parser.add_argument('--output', help='write results as JSON here')
+    parser.add_argument('--compare', help='earlier results to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='allowed median ratio against --compare')
+    return parser.parse_args()
+
+
+def child_env():
+    env = dict(os.environ)
+    if ARGS.db:
+        env['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(ARGS.db)
+    return env
+
+
+def timed_run():
+    result = subprocess.run([sys.executable, '-c', CHILD, ARGS.url], capture_output=True, text=True,
+                            cwd=ROOT, env=child_env(), check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile():
+    """({module: (self_us, cumulative_us)}, [(cumulative_us, module) imported directly by app.py])
+
+    From one `python -X importtime -c 'import app'`. importtime prints a module
+    after everything it imported, indented one level deeper than it.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], capture_output=True,
+                            text=True, cwd=ROOT, env=child_env(), check=True)
+    modules, children, direct = {}, [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        modules[name] = (int(self_us), int(cumulative_us))
+        if depth == 1:
+            children.append((int(cumulative_us), name))
+        elif depth == 0:
+            if name == 'app':
+                direct = sorted(children, reverse=True)
+            children = []
+    return modules, direct
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run():
+    runs = [timed_run() for _ in range(ARGS.runs)]
+    modules, direct = import_profile()
+    own = sorted(((self_us, name) for name, (self_us, _) in modules.items()), reverse=True)[:ARGS.top]
+    summary = {
+        'import_ms': round(statistics.median(r['import_ms'] for r in runs), 2),
+        'import_max_ms': round(max(r['import_ms'] for r in runs), 2),
+        'first_request_ms': round(statistics.median(r['first_request_ms'] for r in runs), 2),
+        'first_request_max_ms': round(max(r['first_request_ms'] for r in runs), 2),
+        'modules': runs[-1]['modules'],
+        'status': sorted({r['status'] for r in runs}),
+    }
+
+    print(f"import app          median {summary['import_ms']:8.2f}ms  max {summary['import_max_ms']:8.2f}ms  "
+          f"({summary['modules']} modules)")
+    print(f"first request {ARGS.url:5} median {summary['first_request_ms']:8.2f}ms  "
+          f"max {summary['first_request_max_ms']:8.2f}ms  {summary['status']}")
+    print("\nImported by app.py (cumulative):")
+    for cumulative, name in direct[:ARGS.top]:
+        print(f"  {cumulative / 1000:8.2f}ms  {name}")
+    print("\nSlowest modules (self):")
+    for self_us, name in own:
+        print(f"  {self_us / 1000:8.2f}ms  {name}")
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'runs': ARGS.runs,
+            'url': ARGS.url,
+        },
+        'summary': summary,
+        'imports': {name: {'self_ms': self_us / 1000, 'cumulative_ms': cumulative / 1000}
+                    for name, (self_us, cumulative) in modules.items()},
+    }
+
+
+def compare(results, baseline):
+    """Print median ratios against `baseline`; returns the number of regressions"""
+    regressions = 0
+    for key in ('import_ms', 'first_request_ms'):
+        old, new = baseline['summary'][key], results['summary'][key]
+        ratio = new / old if old else 1.0
+        flag = 'REGRESSED' if ratio > ARGS.threshold else 'ok'
+        regressions += flag != 'ok'
+        print(f"{flag:9} {key:16} {old:8.2f} -> {new:8.2f}ms (x{ratio:.2f})")
+    old_modules, new_modules = set(baseline['imports']), set(results['imports'])
+    added = sorted(new_modules - old_modules, key=lambda name: -results['imports'][name]['cumulative_ms'])
+    if added:
+        print(f"{len(added)} module(s) newly imported at startup, e.g. {', '.join(added[:10])}")
+    return regressions
+
+
+ARGS = parse_args()
+
+if __name__ == '__main__':
+    results = run()
+    if ARGS.output:
+        with open(ARGS.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {ARGS.output}")
+    if ARGS.compare:
+        with open(ARGS.compare) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline)
+        print(f"{regressions} regression(s) beyond x{ARGS.threshold}")
+        if regressions:
+            sys.exit(1)
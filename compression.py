@@ -0,0 +1,91 @@
+"""
+HTTP response compression - Accept-Encoding negotiation, the encoders, and
+build-time .br/.gz copies of static files
+
+gzip is always available; Brotli is offered when the brotli package is
+installed. Encoders are imported on first use, so a cold process that never
+compresses anything does not load them.
+"""
+from functools import lru_cache
+import importlib.util
+import mimetypes
+import os
+
+GZIP_LEVEL = 6
+# About gzip's speed at a noticeably better ratio
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = frozenset({
+    'application/javascript', 'application/json', 'application/manifest+json', 'application/xml',
+    'image/svg+xml', 'image/x-icon',
+})
+# Build-time compressed copies of static files (flask fingerprint-static --precompress)
+SIBLING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+@lru_cache(maxsize=None)
+def supported_encodings():
+    """Content codings this process can produce, most preferred first"""
+    if importlib.util.find_spec('brotli') is None:
+        return ('gzip',)
+    return ('br', 'gzip')
+
+
+def negotiate(accept_encodings):
+    """Best coding for a request's Accept-Encoding (werkzeug's request.accept_encodings), or None for identity"""
+    encoding = accept_encodings.best_match([*supported_encodings(), 'identity'])
+    return None if encoding == 'identity' else encoding
+
+
+def compress(body, encoding, best=False):
+    """`body` encoded with `encoding`; `best` spends the most CPU, for bodies compressed once and kept"""
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    if encoding == 'gzip':
+        import gzip
+        # mtime=0: the same body always compresses to the same bytes
+        return gzip.compress(body, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+    raise ValueError(f'unsupported content coding {encoding!r}')
+
+
+def is_compressible(mimetype):
+    """Text formats; images (WebP, AVIF, JPEG), WOFF2 fonts and archives are compressed already"""
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def precompressed_sibling(path, encoding):
+    """The build-time .br/.gz copy of a static file, if there is one at least as new as the file"""
+    sibling = path + SIBLING_SUFFIXES[encoding]
+    try:
+        if os.path.getmtime(sibling) >= os.path.getmtime(path):
+            return sibling
+    except OSError:
+        pass
+    return None
+
+
+def write_siblings(folder, min_size):
+    """Write .br/.gz copies of compressible files under `folder`; returns (written, up to date)"""
+    written = current = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            mimetype = mimetypes.guess_type(name)[0]
+            if (name.endswith(tuple(SIBLING_SUFFIXES.values())) or not mimetype or not is_compressible(mimetype)
+                    or os.path.getsize(path) < min_size):
+                continue
+            body = None
+            for encoding in supported_encodings():
+                if precompressed_sibling(path, encoding):
+                    current += 1
+                    continue
+                if body is None:
+                    with open(path, 'rb') as f:
+                        body = f.read()
+                temp_path = path + SIBLING_SUFFIXES[encoding] + '.tmp'
+                with open(temp_path, 'wb') as f:
+                    f.write(compress(body, encoding, best=True))
+                os.replace(temp_path, path + SIBLING_SUFFIXES[encoding])
+                written += 1
+    return written, current
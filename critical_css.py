@@ -0,0 +1,191 @@
+"""
+Critical CSS - the stylesheet rules a page's first screen uses
+
+flask build-assets renders one page per endpoint and keeps the rules whose
+selectors match an element on its first screen: everything before <main>
+(header, menus, flash messages) and <main>'s first child. Matching is by
+tag, class and id only, ignoring combinators and pseudo-classes, so it can
+keep a rule the page does not need but never drops one it does. The rest of
+the stylesheet loads without blocking rendering, before anyone scrolls.
+"""
+from html.parser import HTMLParser
+import re
+
+# Elements without an end tag
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr',
+})
+# At-rules whose block holds rules rather than declarations
+GROUPING_RULES = ('@media', '@supports', '@layer', '@container')
+
+_PSEUDO = re.compile(r'::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?')
+_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+_COMBINATORS = re.compile(r'[\s>+~]+')
+_TAG = re.compile(r'^[a-zA-Z][\w-]*')
+
+
+class FirstScreenParser(HTMLParser):
+    """Collects (tag, classes, id) of the elements on a page's first screen"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.elements = set()
+        self.depth = 0
+        self.main_depth = None
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        self.elements.add((tag, frozenset((attrs.get('class') or '').split()), attrs.get('id')))
+        if tag in VOID_ELEMENTS:
+            return
+        self.depth += 1
+        if tag == 'main' and self.main_depth is None:
+            self.main_depth = self.depth
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and not self.done:
+            self.depth -= 1
+
+    def handle_endtag(self, tag):
+        if self.done or tag in VOID_ELEMENTS:
+            return
+        self.depth -= 1
+        # The end of <main>'s first child (or of an empty <main>) is the fold
+        if self.main_depth is not None and self.depth <= self.main_depth:
+            self.done = True
+
+
+def first_screen_elements(html):
+    parser = FirstScreenParser()
+    parser.feed(html)
+    parser.close()
+    return parser.elements
+
+
+def _compound_matches(compound, elements):
+    tag = _TAG.match(compound)
+    tag = tag.group() if tag else None
+    classes = set(re.findall(r'\.([\w-]+)', compound))
+    ids = re.findall(r'#([\w-]+)', compound)
+    return any((tag is None or tag == element_tag) and classes <= element_classes
+               and all(i == element_id for i in ids)
+               for element_tag, element_classes, element_id in elements)
+
+
+def selector_matches(selector, elements):
+    """Whether every compound of `selector` matches some element (`*`, :root and bare pseudo-classes always do)"""
+    selector = _ATTRIBUTE.sub('', _PSEUDO.sub('', selector)).replace('*', '')
+    return all(_compound_matches(compound, elements) for compound in _COMBINATORS.split(selector) if compound)
+
+
+def _split(text, separator):
+    """Split at `separator` outside strings and parentheses"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote and text[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _find(css, chars, pos):
+    """Index of the first of `chars` at or after `pos`, outside strings and parentheses"""
+    depth, quote = 0, None
+    for i in range(pos, len(css)):
+        char = css[i]
+        if quote:
+            if char == quote and css[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char in chars and depth == 0:
+            return i
+    return len(css)
+
+
+def parse_css(css, pos=0):
+    """Parse minified CSS into nodes; returns (nodes, end position).
+
+    Nodes are ('rule', selectors, declarations), ('group', prelude, nodes),
+    ('keyframes', name, text) and ('other', text) for anything kept whole.
+    """
+    nodes = []
+    while pos < len(css):
+        if css[pos] == '}':
+            return nodes, pos + 1
+        end = _find(css, '{;}', pos)
+        prelude = css[pos:end].strip()
+        if end == len(css) or css[end] != '{':
+            # Block-less at-rule (@import, @charset) or a stray semicolon
+            if prelude:
+                nodes.append(('other', prelude + ';'))
+            pos = end + 1 if end < len(css) and css[end] == ';' else end
+            continue
+        if prelude.startswith(GROUPING_RULES):
+            children, pos = parse_css(css, end + 1)
+            nodes.append(('group', prelude, children))
+            continue
+        close = _find(css, '}', end + 1)
+        if 'keyframes' in prelude.split(' ', 1)[0]:
+            # Keyframe selectors (from, 50%) contain nested blocks
+            depth, close = 1, end + 1
+            while depth and close < len(css):
+                close = _find(css, '{}', close)
+                depth += 1 if css[close] == '{' else -1
+                close += 1
+            nodes.append(('keyframes', prelude.split(' ', 1)[-1], css[pos:close]))
+            pos = close
+            continue
+        if prelude.startswith('@'):
+            nodes.append(('other', css[pos:close + 1]))
+        else:
+            nodes.append(('rule', _split(prelude, ','), css[end + 1:close]))
+        pos = close + 1
+    return nodes, pos
+
+
+def _serialize(nodes, elements, used_text):
+    out = []
+    for node in nodes:
+        if node[0] == 'rule':
+            selectors = [selector for selector in node[1] if selector_matches(selector, elements)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{node[2]}}}")
+                used_text.append(node[2])
+        elif node[0] == 'group':
+            inner = _serialize(node[2], elements, used_text)
+            if inner:
+                out.append(f"{node[1]}{{{inner}}}")
+        elif node[0] == 'other':
+            out.append(node[1])
+    return ''.join(out)
+
+
+def critical_css(css, html):
+    """The rules of minified `css` used by the first screen of the page `html`, in stylesheet order"""
+    nodes, _ = parse_css(css)
+    used_text = []
+    kept = _serialize(nodes, first_screen_elements(html), used_text)
+    # Animations the kept rules run
+    declarations = ' '.join(used_text)
+    keyframes = ''.join(node[2] for node in nodes
+                        if node[0] == 'keyframes' and re.search(rf'(?<![\w-]){re.escape(node[1])}(?![\w-])', declarations))
+    return kept + keyframes
@@ -0,0 +1,146 @@
+"""
+Size-bounded disk cache for derived files, with single-flight generation
+"""
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-flight within the process only
+    fcntl = None
+
+LOCK_DIR = '.locks'
+# Names share this many lock files, so .locks/ stays the same size however many entries come and go
+LOCK_STRIPES = 64
+
+
+class DiskCache:
+    """Files under `folder`, evicted least recently used first once over `max_bytes`.
+
+    fetch() generates a missing entry exactly once, however many threads or
+    processes ask for it at the same time; the others wait and reuse the file.
+    """
+
+    def __init__(self, folder, max_bytes, low_water=0.9):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.size = None
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def fetch(self, name, produce):
+        """Path of the cached `name`, calling produce(temp_path) to write it if missing"""
+        path = self.path(name)
+        if self._hit(path):
+            return path
+        with self._single_flight(name):
+            if self._hit(path):
+                return path
+            os.makedirs(self.folder, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.folder, prefix='.tmp-')
+            os.close(fd)
+            try:
+                produce(temp_path)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        self._added(path)
+        return path
+
+    def _hit(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        # Recency lives in atime, set explicitly (noatime mounts); mtime stays the ETag source
+        now = time.time()
+        if now - stat.st_atime > 60:
+            os.utime(path, (now, stat.st_mtime))
+        return True
+
+    def _single_flight(self, name):
+        with self._locks_guard:
+            entry = self._locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        return _Flight(self, name, entry)
+
+    def _release(self, name, entry):
+        with self._locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[name]
+
+    def _added(self, path):
+        with self._evict_lock:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self._entries())
+            else:
+                self.size += os.path.getsize(path)
+            if self.size > self.max_bytes:
+                self._evict(keep=path)
+
+    def _entries(self):
+        for entry in os.scandir(self.folder):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                yield entry.path, stat.st_size, stat.st_atime
+
+    def _evict(self, keep):
+        """Delete least recently used files, other than `keep`, down to the low-water mark.
+
+        The directory is rescanned, so files written by other processes count too.
+        """
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.low_water
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.size = total
+
+
+class _Flight:
+    """Holds the per-name thread lock, plus an flock shared with other processes.
+
+    The flock is on one of LOCK_STRIPES files, picked by a stable hash of the
+    name; names that share a stripe may briefly wait on each other.
+    """
+
+    def __init__(self, cache, name, entry):
+        self.cache = cache
+        self.name = name
+        self.entry = entry
+        self.lock_file = None
+
+    def __enter__(self):
+        self.entry[0].acquire()
+        if fcntl is not None:
+            lock_dir = os.path.join(self.cache.folder, LOCK_DIR)
+            os.makedirs(lock_dir, exist_ok=True)
+            stripe = zlib.crc32(self.name.encode()) % LOCK_STRIPES
+            self.lock_file = open(os.path.join(lock_dir, f'{stripe}.lock'), 'w')
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        if self.lock_file is not None:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+            self.lock_file.close()
+        self.entry[0].release()
+        self.cache._release(self.name, self.entry)
@@ -0,0 +1,21 @@
+"""
+Per-app services built by create_app(), reachable from any module while an app context is active
+"""
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+
+def _service(name):
+    return LocalProxy(lambda: current_app.extensions[name])
+
+
+translations = _service('translations')
+static_manifest = _service('static_manifest')
+asset_bundle = _service('asset_bundle')
+page_cache = _service('page_cache')
+catalog_snapshots = _service('catalog_snapshots')
+image_cache = _service('image_cache')
+compressed_bodies = _service('compressed_bodies')
+metrics = _service('metrics')
+message_batcher = _service('message_batcher')
+job_queue = _service('job_queue')
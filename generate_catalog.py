@@ -0,0 +1,180 @@
+"""
+Generate a synthetic catalog of configurable size into a fresh SQLite file
+
+    python generate_catalog.py --db /tmp/bench.db --paintings 10000 --messages 1000000
+
+Everything derives from --seed, so the same arguments always build the same
+catalog. Run benchmark.py against the result.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', required=True, help='SQLite file to create')
+    parser.add_argument('--upload-folder', help='where painting images go (default: <db dir>/paintings)')
+    parser.add_argument('--paintings', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--images', type=int, default=40, help='distinct images shared by the paintings')
+    parser.add_argument('--renditions', action='store_true', help='also build responsive renditions')
+    parser.add_argument('--seed', type=int, default=2026)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--force', action='store_true', help='overwrite an existing --db')
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+db_path = os.path.abspath(ARGS.db)
+if os.path.exists(db_path):
+    if not ARGS.force:
+        sys.exit(f"{db_path} exists; pass --force to overwrite it")
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+ARGS.upload_folder = os.path.abspath(ARGS.upload_folder or os.path.join(os.path.dirname(db_path), 'paintings'))
+os.makedirs(ARGS.upload_folder, exist_ok=True)
+# Must be set before app is imported: its engine and upload folder are fixed at import
+os.environ['DATABASE_URL'] = 'sqlite:///' + db_path
+os.environ['UPLOAD_FOLDER'] = ARGS.upload_folder
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from app import app, db, Admin, Painting, ContactMessage, bump_catalog_version, upgrade_schema  # noqa: E402
+from imaging import build_renditions  # noqa: E402
+from migrations import seed_counters  # noqa: E402
+from storage import store_stream  # noqa: E402
+
+# Fixed clock so generated dates do not depend on when the script runs
+EPOCH = datetime(2026, 1, 1)
+
+WORDS = {
+    'uk': ['Одеса', 'море', 'світанок', 'бульвар', 'дворик', 'півонії', 'вітер', 'порт', 'сад', 'осінь',
+           'Привоз', 'маяк', 'акація', 'тиша', 'вечір', 'причал', 'дощ', 'трамвай', 'сонце', 'хвиля'],
+    'en': ['Odessa', 'sea', 'dawn', 'boulevard', 'courtyard', 'peonies', 'wind', 'harbour', 'garden', 'autumn',
+           'Privoz', 'lighthouse', 'acacia', 'silence', 'evening', 'pier', 'rain', 'tram', 'sun', 'wave'],
+    'ru': ['Одесса', 'море', 'рассвет', 'бульвар', 'дворик', 'пионы', 'ветер', 'порт', 'сад', 'осень',
+           'Привоз', 'маяк', 'акация', 'тишина', 'вечер', 'причал', 'дождь', 'трамвай', 'солнце', 'волна'],
+}
+TECHNIQUES = [
+    ('Олія на полотні', 'Oil on canvas', 'Масло на холсте'),
+    ('Олія на картоні', 'Oil on cardboard', 'Масло на картоне'),
+    ('Акрил на полотні', 'Acrylic on canvas', 'Акрил на холсте'),
+]
+
+
+def phrase(rng, lang, indexes):
+    return ' '.join(WORDS[lang][i] for i in indexes).capitalize()
+
+
+def generate_images(rng, count, renditions):
+    """Paint `count` distinct images; returns [(filename, renditions_json), ...]"""
+    images = []
+    for i in range(count):
+        width, height = rng.choice([(1600, 1200), (1200, 1600), (1600, 1600), (2000, 1300)])
+        image = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(60):
+            x, y = rng.randrange(width), rng.randrange(height)
+            draw.ellipse((x, y, x + rng.randrange(40, 400), y + rng.randrange(40, 400)),
+                         fill=tuple(rng.randrange(256) for _ in range(3)))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        buffer.seek(0)
+        filename = store_stream(buffer, ARGS.upload_folder, '.jpg')
+        built = build_renditions(ARGS.upload_folder, filename) if renditions else None
+        images.append((filename, json.dumps(built) if built else None))
+        print(f"  image {i + 1}/{count}: {filename}")
+    return images
+
+
+def painting_rows(rng, count, images):
+    for _ in range(count):
+        words = rng.sample(range(len(WORDS['en'])), 3)
+        description = rng.sample(range(len(WORDS['en'])), 8)
+        technique = rng.choice(TECHNIQUES)
+        image, renditions = rng.choice(images) if images else (None, None)
+        sold = rng.random() < 0.3
+        yield {
+            'title_uk': phrase(rng, 'uk', words), 'title_en': phrase(rng, 'en', words),
+            'title_ru': phrase(rng, 'ru', words),
+            'description_uk': phrase(rng, 'uk', description), 'description_en': phrase(rng, 'en', description),
+            'description_ru': phrase(rng, 'ru', description),
+            'technique_uk': technique[0], 'technique_en': technique[1], 'technique_ru': technique[2],
+            'width': rng.choice([30, 40, 50, 60, 70, 80, 100]), 'height': rng.choice([30, 40, 50, 60, 70, 80, 100]),
+            'year': rng.randint(2005, 2025), 'price': None if sold else rng.randrange(300, 5000, 50),
+            'is_sold': sold, 'is_available': rng.random() < 0.95, 'is_featured': rng.random() < 0.01,
+            'image': image, 'renditions': renditions,
+            'created_at': EPOCH - timedelta(minutes=rng.randrange(5 * 365 * 24 * 60)),
+            'order': rng.randrange(10) if rng.random() < 0.1 else 0,
+        }
+
+
+def message_rows(rng, count, painting_count):
+    for _ in range(count):
+        yield {
+            'name': f"Visitor {rng.randrange(100000)}",
+            'email': f"visitor{rng.randrange(100000)}@example.com",
+            'phone': f"+380{rng.randrange(10 ** 9):09d}" if rng.random() < 0.5 else None,
+            'painting_id': rng.randint(1, painting_count) if painting_count and rng.random() < 0.6 else None,
+            'message': phrase(rng, rng.choice(['uk', 'en', 'ru']), rng.sample(range(len(WORDS['en'])), 12)),
+            'created_at': EPOCH - timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600)),
+            'is_read': rng.random() < 0.8,
+        }
+
+
+def insert_batched(conn, table, rows, batch_size, label, total):
+    batch = []
+    done = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            conn.execute(table.insert(), batch)
+            done += len(batch)
+            batch = []
+            print(f"  {label}: {done}/{total}", end='\r')
+    if batch:
+        conn.execute(table.insert(), batch)
+    print(f"  {label}: {total}/{total}")
+
+
+def generate():
+    rng = random.Random(ARGS.seed)
+    started = time.perf_counter()
+    with app.app_context():
+        upgrade_schema(db.engine)
+        admin = Admin(username='admin')
+        admin.set_password('kurevin2026')
+        db.session.add(admin)
+        db.session.commit()
+
+        print(f"Images -> {ARGS.upload_folder}")
+        images = generate_images(rng, ARGS.images, ARGS.renditions)
+
+        # Core executemany in one transaction; mapper events (counters) do not
+        # fire here, so the counters are rebuilt from the rows afterwards
+        with db.engine.begin() as conn:
+            insert_batched(conn, Painting.__table__, painting_rows(rng, ARGS.paintings, images),
+                           ARGS.batch_size, 'paintings', ARGS.paintings)
+            insert_batched(conn, ContactMessage.__table__, message_rows(rng, ARGS.messages, ARGS.paintings),
+                           ARGS.batch_size, 'messages', ARGS.messages)
+            seed_counters(conn)
+
+        bump_catalog_version()
+        db.session.commit()
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql('ANALYZE')
+
+    print(f"\n{ARGS.paintings} paintings, {ARGS.messages} messages, {ARGS.images} images "
+          f"in {time.perf_counter() - started:.1f}s -> {os.path.abspath(ARGS.db)}")
+    print("Admin login: admin / kurevin2026")
+
+
+if __name__ == '__main__':
+    generate()
@@ -0,0 +1,54 @@
+"""
+Translation catalogs - one JSON file per language, loaded once into immutable mappings
+"""
+import glob
+import json
+import os
+import pickle
+from types import MappingProxyType
+
+DEFAULT_LANG = 'uk'
+
+
+def read_sources(folder):
+    catalogs = {}
+    for path in sorted(glob.glob(os.path.join(folder, '*.json'))):
+        lang = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as f:
+            catalogs[lang] = json.load(f)
+    return catalogs
+
+
+def _is_fresh(compiled_path, folder):
+    if not compiled_path or not os.path.exists(compiled_path):
+        return False
+    compiled_mtime = os.path.getmtime(compiled_path)
+    return all(os.path.getmtime(path) <= compiled_mtime
+               for path in glob.glob(os.path.join(folder, '*.json')))
+
+
+def load_catalogs(folder, compiled_path=None):
+    """Return {lang: read-only mapping}, each falling back to DEFAULT_LANG for missing keys.
+
+    A compiled catalog is used when it is at least as new as every source file.
+    """
+    catalogs = None
+    if _is_fresh(compiled_path, folder):
+        try:
+            with open(compiled_path, 'rb') as f:
+                catalogs = pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            catalogs = None
+    if catalogs is None:
+        catalogs = read_sources(folder)
+
+    fallback = catalogs[DEFAULT_LANG]
+    return {lang: MappingProxyType({**fallback, **strings}) for lang, strings in catalogs.items()}
+
+
+def compile_catalogs(folder, compiled_path):
+    """Write all source catalogs into a single binary file for fast startup"""
+    catalogs = read_sources(folder)
+    with open(compiled_path, 'wb') as f:
+        pickle.dump(catalogs, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return catalogs
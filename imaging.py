@@ -0,0 +1,163 @@
+"""
+Image derivatives for uploaded paintings - width-bounded responsive renditions,
+placeholder previews, and the colour/texture features behind "similar works"
+
+Pillow and NumPy are imported by the functions that need them, so importing
+this module costs a web worker nothing until it actually handles an image.
+"""
+import os
+
+# Widths the templates can pick from via srcset; originals are never upscaled
+RENDITION_WIDTHS = (320, 640, 960, 1600)
+RENDITION_FORMATS = ('avif', 'webp', 'jpeg')
+RENDITION_DIR = 'renditions'
+
+# Placeholder: a WebP this many pixels on its longer side, inlined as a data URI
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+# Features are taken from a small copy: colour and brush texture survive, noise does not
+FEATURE_SIZE = 96
+HSV_BINS = (8, 3, 3)  # hue, saturation, value
+ORIENTATION_BINS = 8
+TEXTURE_WEIGHT = 0.35
+
+# File extension of each format, which is also the name Pillow's features.check() knows it by
+_EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+_SAVE_OPTIONS = {
+    'avif': {'quality': 55},
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def supported_formats():
+    """Rendition formats the installed Pillow can encode"""
+    from PIL import features
+    return [fmt for fmt in RENDITION_FORMATS if features.check(_EXTENSIONS[fmt])]
+
+
+def _flatten(image):
+    """Convert to RGB, compositing any transparency onto white"""
+    from PIL import Image
+    if image.mode == 'RGB':
+        return image
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def build_renditions(upload_folder, filename):
+    """Write resized copies of an upload and return {format: [[width, filename], ...]}"""
+    from PIL import Image, ImageOps
+    out_dir = os.path.join(upload_folder, RENDITION_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(filename)[0]
+    formats = supported_formats()
+    renditions = {fmt: [] for fmt in formats}
+
+    with Image.open(os.path.join(upload_folder, filename)) as source:
+        image = _flatten(ImageOps.exif_transpose(source))
+        widths = sorted({min(width, image.width) for width in RENDITION_WIDTHS})
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                name = f"{stem}-{width}.{_EXTENSIONS[fmt]}"
+                resized.save(os.path.join(out_dir, name), fmt.upper(), **_SAVE_OPTIONS[fmt])
+                renditions[fmt].append([width, name])
+
+    return renditions
+
+
+def resize_image(source_path, width, fmt, out_path):
+    """Write `source_path` scaled to `width` (never upscaled) as `fmt` to `out_path`"""
+    from PIL import Image, ImageOps
+    with Image.open(source_path) as source:
+        image = _flatten(ImageOps.exif_transpose(source))
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        image.save(out_path, fmt.upper(), **_SAVE_OPTIONS[fmt])
+
+
+def remove_renditions(upload_folder, renditions):
+    """Delete rendition files previously returned by build_renditions"""
+    out_dir = os.path.join(upload_folder, RENDITION_DIR)
+    for entries in renditions.values():
+        for _, name in entries:
+            try:
+                os.remove(os.path.join(out_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+def image_preview(upload_folder, filename):
+    """What a page needs before the image loads: {'width', 'height', 'color', 'placeholder'}.
+
+    width/height are the displayed pixel size (after EXIF rotation), color
+    the dominant colour as '#rrggbb', placeholder a tiny WebP as a data URI
+    of a few hundred bytes, for the browser to scale up while the image loads.
+    """
+    import base64
+    import io
+    from PIL import Image, ImageOps
+    with Image.open(os.path.join(upload_folder, filename)) as source:
+        # draft() may shrink the decoded size, so take the real one first
+        width, height = source.size
+        source.draft('RGB', (PLACEHOLDER_SIZE * 8, PLACEHOLDER_SIZE * 8))
+        image = _flatten(ImageOps.exif_transpose(source))
+        if image.size != source.size:
+            # Rotated by its EXIF orientation
+            width, height = height, width
+    image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.LANCZOS)
+
+    palette = image.quantize(colors=4)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3:index * 3 + 3]
+
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY)
+    return {
+        'width': width,
+        'height': height,
+        'color': f'#{red:02x}{green:02x}{blue:02x}',
+        'placeholder': 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii'),
+    }
+
+
+def image_features(upload_folder, filename):
+    """Colour and texture feature vector of an upload, as a list of floats with unit length.
+
+    Colour is a joint HSV histogram, texture a histogram of gradient
+    orientations weighted by their strength plus the overall edge density.
+    Both halves are square-rooted so that the dot product of two vectors
+    behaves like a histogram overlap (Hellinger), then weighted and
+    normalized together.
+    """
+    from PIL import Image, ImageOps
+    import numpy as np
+    with Image.open(os.path.join(upload_folder, filename)) as source:
+        # JPEG decodes straight to a reduced scale; the thumbnail needs no more
+        source.draft('RGB', (FEATURE_SIZE * 2, FEATURE_SIZE * 2))
+        image = _flatten(ImageOps.exif_transpose(source))
+        image.thumbnail((FEATURE_SIZE, FEATURE_SIZE), Image.BILINEAR)
+
+    hsv = np.asarray(image.convert('HSV'), dtype=np.float32) / 256
+    colour, _ = np.histogramdd(hsv.reshape(-1, 3), bins=HSV_BINS, range=((0, 1),) * 3)
+    colour = np.sqrt(colour.ravel() / colour.sum())
+
+    gray = np.asarray(image.convert('L'), dtype=np.float32) / 255
+    dy, dx = np.gradient(gray)
+    magnitude = np.hypot(dx, dy)
+    # Orientation modulo pi: an edge has the same direction either way across it
+    angle = np.mod(np.arctan2(dy, dx), np.pi)
+    texture, _ = np.histogram(angle, bins=ORIENTATION_BINS, range=(0, np.pi), weights=magnitude)
+    total = texture.sum()
+    texture = np.sqrt(texture / total) if total else texture
+    texture = np.append(texture, min(1.0, float(magnitude.mean()) * 8))
+
+    vector = np.concatenate([colour * (1 - TEXTURE_WEIGHT), texture * TEXTURE_WEIGHT])
+    vector /= np.linalg.norm(vector) or 1
+    return [round(float(value), 5) for value in vector]
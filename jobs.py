@@ -0,0 +1,208 @@
+"""
+Persistent background jobs - rows in the job table, run on a small process pool
+so slow work (image decoding, resizing) never holds a web worker.
+"""
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+import time
+
+import sqlalchemy as sa
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+ACTIVE = (QUEUED, RUNNING)
+
+
+def _lower_priority(niceness):
+    """Pool initializer: let web workers win the CPU over job processes"""
+    if niceness and hasattr(os, 'nice'):
+        os.nice(niceness)
+
+
+class JobQueue:
+    """Runs queued rows of `model` with the handlers registered per job kind.
+
+    A handler is a `work(**payload)` function, executed in a pool process, and
+    an optional `done(payload, result)` callback applied in the app process in
+    the same transaction that marks the job done. Failed jobs are retried with
+    exponential backoff; jobs left running by a dead process are requeued
+    after `timeout` seconds. In 'inline' mode jobs run in the calling thread
+    instead, for hosts without long-lived processes.
+    """
+
+    def __init__(self, app, db, model):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.handlers = {}
+        self.mode = app.config['JOB_MODE']
+        self.workers = app.config['JOB_WORKERS']
+        self.niceness = app.config['JOB_NICENESS']
+        self.max_attempts = app.config['JOB_MAX_ATTEMPTS']
+        self.retry_delay = app.config['JOB_RETRY_DELAY']
+        self.timeout = app.config['JOB_TIMEOUT']
+        self.poll_interval = app.config['JOB_POLL_INTERVAL']
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def register(self, kind, work, done=None):
+        self.handlers[kind] = (work, done)
+
+    def enqueue(self, kind, **payload):
+        """Add a job to the current session; it is queued when the session commits"""
+        job = self.model(kind=kind, payload=json.dumps(payload), status=QUEUED,
+                         attempts=0, run_after=datetime.utcnow())
+        self.db.session.add(job)
+        return job
+
+    def start(self):
+        """Start this process's dispatcher (pool mode), picking up jobs left from before a restart"""
+        if self.mode != 'inline':
+            self._ensure_thread()
+
+    def kick(self):
+        """Call after committing new jobs: runs them now (inline) or wakes the dispatcher"""
+        if self.mode == 'inline':
+            self.run_pending()
+        else:
+            self._ensure_thread()
+            self._wake.set()
+
+    def run_pending(self):
+        """Run every due job in this thread; returns how many ran"""
+        count = 0
+        while True:
+            job = self._claim()
+            if job is None:
+                return count
+            try:
+                result = self.handlers[job['kind']][0](**job['payload'])
+            except Exception as exc:
+                self._finish(job, error=exc)
+            else:
+                self._finish(job, result=result)
+            count += 1
+
+    # ---- dispatcher ----
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._pool = None
+                self._thread = threading.Thread(target=self._run, name='job-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _executor(self):
+        if self._pool is None:
+            # Imported here: inline mode and processes that only enqueue never need a pool
+            from concurrent.futures import ProcessPoolExecutor
+            import multiprocessing
+            # spawn: forking a threaded web worker can copy held locks into the child
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_lower_priority, initargs=(self.niceness,), max_tasks_per_child=50)
+        return self._pool
+
+    def _run(self):
+        from concurrent.futures.process import BrokenProcessPool
+        running = {}
+        requeued_at = None
+        while True:
+            if requeued_at is None or time.monotonic() - requeued_at > self.timeout:
+                self._requeue_stale()
+                requeued_at = time.monotonic()
+            while len(running) < self.workers:
+                job = self._claim()
+                if job is None:
+                    break
+                try:
+                    running[self._executor().submit(self.handlers[job['kind']][0], **job['payload'])] = job
+                except BrokenProcessPool as exc:
+                    self._pool = None
+                    self._finish(job, error=exc)
+            if not running:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                error = future.exception()
+                if isinstance(error, BrokenProcessPool):
+                    self._pool = None
+                self._finish(job, error=error, result=None if error else future.result())
+
+    # ---- state transitions ----
+
+    def _claim(self):
+        """Atomically mark the next due job running; returns it as a dict, or None"""
+        Job = self.model
+        now = datetime.utcnow()
+        with self.app.app_context():
+            due = sa.select(Job.id).where(Job.status == QUEUED, Job.run_after <= now)
+            # Cheap read first, so idle polling never takes the write lock
+            if self.db.session.execute(due.limit(1)).first() is None:
+                return None
+            next_id = due.order_by(Job.run_after, Job.id).limit(1).scalar_subquery()
+            row = self.db.session.execute(
+                sa.update(Job)
+                .where(Job.id == next_id, Job.status == QUEUED)
+                .values(status=RUNNING, attempts=Job.attempts + 1, locked_at=now)
+                .returning(Job.id, Job.kind, Job.payload, Job.attempts)
+                .execution_options(synchronize_session=False)
+            ).first()
+            self.db.session.commit()
+        if row is None:
+            return None
+        job = {'id': row.id, 'kind': row.kind, 'payload': json.loads(row.payload), 'attempts': row.attempts}
+        if job['kind'] not in self.handlers:
+            self._finish(job, error=LookupError(f"no handler for job kind {job['kind']!r}"), retry=False)
+            return self._claim()
+        return job
+
+    def _finish(self, job, result=None, error=None, retry=True):
+        with self.app.app_context():
+            record = self.db.session.get(self.model, job['id'])
+            if error is None:
+                try:
+                    done = self.handlers[job['kind']][1]
+                    if done is not None:
+                        done(job['payload'], result)
+                except Exception as exc:
+                    self.db.session.rollback()
+                    record = self.db.session.get(self.model, job['id'])
+                    error = exc
+            if error is None:
+                record.status = DONE
+                record.result = json.dumps(result)
+                record.error = None
+                record.finished_at = datetime.utcnow()
+            elif retry and job['attempts'] < self.max_attempts:
+                record.status = QUEUED
+                record.error = repr(error)
+                record.run_after = datetime.utcnow() + timedelta(seconds=self.retry_delay * 2 ** (job['attempts'] - 1))
+            else:
+                record.status = FAILED
+                record.error = repr(error)
+                record.finished_at = datetime.utcnow()
+            record.locked_at = None
+            self.db.session.commit()
+
+    def _requeue_stale(self):
+        """Return jobs whose process died mid-run (e.g. a restart) to the queue"""
+        Job = self.model
+        with self.app.app_context():
+            stale = datetime.utcnow() - timedelta(seconds=self.timeout)
+            self.db.session.execute(
+                sa.update(Job)
+                .where(Job.status == RUNNING, Job.locked_at < stale)
+                .values(status=QUEUED, locked_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.session.commit()
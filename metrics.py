@@ -0,0 +1,162 @@
+"""
+Per-request instrumentation - latency, SQL and template timings as Prometheus metrics.
+
+Metrics are kept per process; with several gunicorn workers each scrape sees
+the worker that answered it.
+"""
+from bisect import bisect_left
+import threading
+import time
+
+from flask import g, has_request_context, request, before_render_template, template_rendered
+import sqlalchemy as sa
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SLOW_LOG_STATEMENTS = 10
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, in Prometheus' model"""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+        for label_values, (counts, total, count) in series:
+            labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            prefix = labels + ',' if labels else ''
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f'{self.name}{{{labels}}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    def __init__(self):
+        self.requests = Counter('http_requests_total', 'Requests by endpoint, method and status',
+                                ('endpoint', 'method', 'status'))
+        self.latency = Histogram('http_request_duration_seconds', 'Request latency',
+                                 ('endpoint', 'method'), LATENCY_BUCKETS)
+        self.queries = Histogram('db_queries_per_request', 'SQL statements issued per request',
+                                 ('endpoint',), QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram('db_time_seconds', 'Time spent in SQL per request',
+                                 ('endpoint',), LATENCY_BUCKETS)
+        self.render_time = Histogram('template_render_seconds', 'Template render time',
+                                     ('template',), LATENCY_BUCKETS)
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.latency, self.queries, self.db_time, self.render_time):
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+def instrument(app, metrics, slow_request_ms=None):
+    """Hook `metrics` into app requests and template renders; see instrument_engine() for SQL.
+
+    Requests slower than `slow_request_ms` are logged with their slowest statements.
+    """
+    def before_request():
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_time = 0.0
+        g.metrics_statements = [] if slow_request_ms else None
+
+    def after_request(response):
+        if 'metrics_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_started
+        endpoint = request.endpoint or 'unmatched'
+        metrics.requests.inc(endpoint, request.method, response.status_code)
+        metrics.latency.observe(elapsed, endpoint, request.method)
+        metrics.queries.observe(g.metrics_queries, endpoint)
+        metrics.db_time.observe(g.metrics_db_time, endpoint)
+        if slow_request_ms and elapsed * 1000 >= slow_request_ms:
+            slowest = sorted(g.metrics_statements, reverse=True)[:SLOW_LOG_STATEMENTS]
+            app.logger.warning(
+                'Slow request %s %s: %.1fms, %d queries, %.1fms in SQL%s', request.method, request.full_path,
+                elapsed * 1000, g.metrics_queries, g.metrics_db_time * 1000,
+                ''.join(f'\n  {ms:8.2f}ms  {statement}' for ms, statement in slowest))
+        return response
+
+    def on_before_render(sender, template, context, **extra):
+        g.setdefault('metrics_render_started', []).append(time.perf_counter())
+
+    def on_rendered(sender, template, context, **extra):
+        started = g.get('metrics_render_started')
+        if started:
+            metrics.render_time.observe(time.perf_counter() - started.pop(), template.name or 'string')
+
+    app.before_request(before_request)
+    app.after_request(after_request)
+    before_render_template.connect(on_before_render, app, weak=False)
+    template_rendered.connect(on_rendered, app, weak=False)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_started', None)
+    # Background threads (job dispatcher, write batcher) have no request to charge
+    if started is None or not has_request_context() or 'metrics_started' not in g:
+        return
+    elapsed = time.perf_counter() - started
+    g.metrics_queries += 1
+    g.metrics_db_time += elapsed
+    if g.metrics_statements is not None:
+        g.metrics_statements.append((elapsed * 1000, ' '.join(statement.split())))
+
+
+def instrument_engine(engine):
+    """Charge the SQL `engine` runs to the current request's metrics"""
+    sa.event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    sa.event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,177 @@
+"""
+Versioned schema migrations for the SQLite database.
+
+The applied version is kept in PRAGMA user_version. Every migration is
+idempotent, so it is also safe on a database freshly built by create_all.
+Deploys run them with `flask migrate`; the app also upgrades a database
+still behind when it first opens it. A database that is already current is
+only read, so it may be read-only (as on Vercel, which serves the committed
+instance/kurevin.db).
+"""
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return decorator
+
+
+def column_names(conn, table):
+    return {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+
+
+def add_column(conn, table, column, ddl):
+    if column not in column_names(conn, table):
+        conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}')
+
+
+def schema_version(conn):
+    return conn.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def latest_version():
+    return max(version for version, _, _ in MIGRATIONS)
+
+
+def stored_version(engine):
+    """The database's user_version, read outside any transaction (so without taking the write lock)"""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA user_version')
+        version = cursor.fetchone()[0]
+        cursor.close()
+        return version
+    finally:
+        connection.close()
+
+
+def run_migrations(engine):
+    """Apply pending migrations in order; returns the (version, description) pairs applied"""
+    applied = []
+    with engine.begin() as conn:
+        current = schema_version(conn)
+        for version, description, func in sorted(MIGRATIONS, key=lambda m: m[0]):
+            if version <= current:
+                continue
+            func(conn)
+            conn.exec_driver_sql(f'PRAGMA user_version = {int(version)}')
+            applied.append((version, description))
+    return applied
+
+
+def explain(conn, statement, parameters=()):
+    """EXPLAIN QUERY PLAN detail lines for a statement"""
+    return [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+
+# Tables holding a fixed handful of rows, where a scan is the intended plan
+BOUNDED_TABLES = {'counter', 'catalog_state'}
+
+
+def is_table_scan(detail):
+    """True for plan steps that read every row of a table, through an index or not.
+
+    Only SEARCH steps seek into an index; `SCAN t USING [COVERING] INDEX i`
+    still walks all of t.
+    """
+    if not detail.startswith('SCAN ') or detail == 'SCAN CONSTANT ROW':
+        return False
+    # Virtual tables (full-text search) plan their own lookups
+    if ' VIRTUAL TABLE INDEX ' in detail:
+        return False
+    return detail.split()[1] not in BOUNDED_TABLES
+
+
+# ============== MIGRATIONS ==============
+
+@migration(1, 'painting.renditions for responsive image renditions')
+def add_painting_renditions(conn):
+    add_column(conn, 'painting', 'renditions', 'TEXT')
+
+
+@migration(2, 'indexes matching public and admin query shapes')
+def add_query_indexes(conn):
+    for statement in (
+        # home: featured + available, by order
+        'CREATE INDEX IF NOT EXISTS ix_painting_featured ON painting (is_featured, is_available, "order")',
+        # gallery (all), home fallback, related works
+        'CREATE INDEX IF NOT EXISTS ix_painting_public ON painting (is_available, "order", created_at DESC, id DESC)',
+        # gallery with the available / sold filter
+        'CREATE INDEX IF NOT EXISTS ix_painting_public_sold ON painting '
+        '(is_available, is_sold, "order", created_at DESC, id DESC)',
+        # studio painting list and sold count
+        'CREATE INDEX IF NOT EXISTS ix_painting_order ON painting ("order", created_at DESC, id DESC)',
+        'CREATE INDEX IF NOT EXISTS ix_painting_is_sold ON painting (is_sold)',
+        # inbox ordering and unread count
+        'CREATE INDEX IF NOT EXISTS ix_contact_message_created_at ON contact_message (created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_contact_message_is_read ON contact_message (is_read)',
+    ):
+        conn.exec_driver_sql(statement)
+
+
+@migration(3, 'maintained dashboard counters and inquiry history')
+def seed_counters(conn):
+    # Tables come from create_all; this fills them from the existing rows
+    conn.exec_driver_sql('DELETE FROM counter')
+    conn.exec_driver_sql(
+        'INSERT INTO counter (name, value) '
+        "SELECT 'paintings_total', count(*) FROM painting UNION ALL "
+        "SELECT 'paintings_available', count(*) FROM painting WHERE is_sold = 0 AND is_available = 1 UNION ALL "
+        "SELECT 'paintings_sold', count(*) FROM painting WHERE is_sold = 1 UNION ALL "
+        "SELECT 'messages_total', count(*) FROM contact_message UNION ALL "
+        "SELECT 'messages_unread', count(*) FROM contact_message WHERE is_read = 0"
+    )
+    conn.exec_driver_sql('DELETE FROM inquiry_stat')
+    conn.exec_driver_sql(
+        'INSERT INTO inquiry_stat (painting_id, day, count) '
+        'SELECT painting_id, date(created_at), count(*) FROM contact_message '
+        'WHERE painting_id IS NOT NULL GROUP BY painting_id, date(created_at)'
+    )
+
+
+@migration(4, 'indexes for inbox filters')
+def add_inbox_indexes(conn):
+    for statement in (
+        'CREATE INDEX IF NOT EXISTS ix_contact_message_painting ON contact_message (painting_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_contact_message_read_created ON contact_message (is_read, created_at)',
+    ):
+        conn.exec_driver_sql(statement)
+
+
+@migration(5, 'FTS5 index over painting titles, descriptions and techniques')
+def add_painting_fts(conn):
+    from search import create_index_sql
+    for statement in create_index_sql():
+        conn.exec_driver_sql(statement)
+
+
+@migration(6, 'index on painting.image for upload reference counts')
+def add_painting_image_index(conn):
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_painting_image ON painting (image)')
+
+
+@migration(7, 'index for claiming due background jobs')
+def add_job_index(conn):
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_job_status ON job (status, run_after)')
+
+
+@migration(8, 'painting.features for the similar works index')
+def add_painting_features(conn):
+    # similar_painting itself comes from create_all; build-similarity fills both
+    add_column(conn, 'painting', 'features', 'TEXT')
+
+
+@migration(9, 'painting image dimensions, dominant colour and placeholder')
+def add_painting_preview(conn):
+    add_column(conn, 'painting', 'image_width', 'INTEGER')
+    add_column(conn, 'painting', 'image_height', 'INTEGER')
+    add_column(conn, 'painting', 'dominant_color', 'VARCHAR(7)')
+    add_column(conn, 'painting', 'placeholder', 'TEXT')
+
+
+@migration(10, 'index for the similar works lists that name a painting')
+def add_similar_painting_index(conn):
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_similar_painting_similar ON similar_painting (similar_id)')
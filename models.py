@@ -0,0 +1,352 @@
+"""
+Database models, the counters they maintain, and the extension that owns their engines
+"""
+from datetime import datetime
+import json
+import threading
+from weakref import WeakKeyDictionary
+
+from flask import current_app
+from flask_login import UserMixin
+from flask_sqlalchemy import SQLAlchemy
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from migrations import latest_version, run_migrations, stored_version
+from similarity import NEIGHBOURS, nearest_neighbours
+from sqlite_concurrency import RoutingSession
+
+
+class LazySQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy that creates an app's engines on first use instead of in init_app.
+
+    A cold process that never touches the database (or not yet) pays nothing
+    for it. Callbacks added with on_engine_created() get each new engine, with
+    the app, before anything else can use it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_options = WeakKeyDictionary()
+        self._engine_callbacks = []
+        self._engines_lock = threading.Lock()
+
+    def on_engine_created(self, callback):
+        self._engine_callbacks.append(callback)
+        return callback
+
+    def _make_engine(self, bind_key, options, app):
+        # init_app: keep the options, the engine is built by `engines` when first asked for
+        self._pending_options.setdefault(app, {})[bind_key] = options
+        return None
+
+    @property
+    def engines(self):
+        engines = super().engines
+        if None in engines.values():
+            app = current_app._get_current_object()
+            with self._engines_lock:
+                for key, engine in engines.items():
+                    if engine is None:
+                        engine = super()._make_engine(key, self._pending_options[app][key], app)
+                        for callback in self._engine_callbacks:
+                            callback(app, engine)
+                        # Published last, so other threads never see an engine still being set up
+                        engines[key] = engine
+        return engines
+
+
+db = LazySQLAlchemy(session_options={'class_': RoutingSession})
+
+# ============== MODELS ==============
+
+class Admin(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
+    
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+    
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+class PaintingMixin:
+    """Display helpers shared by Painting and the catalog snapshot's PaintingRecord"""
+    __slots__ = ()
+
+    def get_title(self, lang):
+        return getattr(self, f'title_{lang}', self.title_en)
+    
+    def get_description(self, lang):
+        return getattr(self, f'description_{lang}', self.description_en)
+    
+    def get_technique(self, lang):
+        return getattr(self, f'technique_{lang}', self.technique_en)
+    
+    def get_size_display(self):
+        if self.width and self.height:
+            return f"{self.width} × {self.height} cm"
+        return None
+    
+    def get_renditions(self):
+        return json.loads(self.renditions) if self.renditions else {}
+    
+    def get_rendition(self, fmt, width):
+        """Smallest rendition at least `width` wide, or the largest available"""
+        entries = self.get_renditions().get(fmt)
+        if not entries:
+            return None
+        for entry_width, name in entries:
+            if entry_width >= width:
+                return name
+        return entries[-1][1]
+
+    def get_preview(self):
+        """The imaging.image_preview() result stored by set_preview(), or None"""
+        if self.placeholder is None:
+            return None
+        return {'width': self.image_width, 'height': self.image_height,
+                'color': self.dominant_color, 'placeholder': self.placeholder}
+
+class Painting(PaintingMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # Titles in 3 languages
+    title_uk = db.Column(db.String(200), nullable=False)
+    title_en = db.Column(db.String(200), nullable=False)
+    title_ru = db.Column(db.String(200), nullable=False)
+    # Descriptions
+    description_uk = db.Column(db.Text)
+    description_en = db.Column(db.Text)
+    description_ru = db.Column(db.Text)
+    # Technical details
+    width = db.Column(db.Integer)  # in cm
+    height = db.Column(db.Integer)  # in cm
+    year = db.Column(db.Integer)
+    technique_uk = db.Column(db.String(100))  # e.g., "Олія на полотні"
+    technique_en = db.Column(db.String(100))  # e.g., "Oil on canvas"
+    technique_ru = db.Column(db.String(100))  # e.g., "Масло на холсте"
+    # Pricing & availability
+    price = db.Column(db.Float)  # in USD
+    is_sold = db.Column(db.Boolean, default=False)
+    is_available = db.Column(db.Boolean, default=True)
+    is_featured = db.Column(db.Boolean, default=False)
+    # Image
+    image = db.Column(db.String(255))
+    renditions = db.Column(db.Text)  # JSON: {format: [[width, filename], ...]}
+    features = db.Column(db.Text)  # JSON: colour/texture vector from imaging.image_features
+    # Shown before the image loads (imaging.image_preview)
+    image_width = db.Column(db.Integer)  # in pixels
+    image_height = db.Column(db.Integer)
+    dominant_color = db.Column(db.String(7))  # '#rrggbb'
+    placeholder = db.Column(db.Text)  # data URI of a tiny WebP
+    # Metadata
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    order = db.Column(db.Integer, default=0)
+
+    def set_preview(self, preview):
+        """Store an imaging.image_preview() result (or None to clear it)"""
+        preview = preview or {}
+        self.image_width = preview.get('width')
+        self.image_height = preview.get('height')
+        self.dominant_color = preview.get('color')
+        self.placeholder = preview.get('placeholder')
+
+class SimilarPainting(db.Model):
+    """Precomputed nearest neighbours of each painting by image features, best first"""
+    painting_id = db.Column(db.Integer, primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    similar_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+class ContactMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(30))
+    painting_id = db.Column(db.Integer, db.ForeignKey('painting.id'))
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_read = db.Column(db.Boolean, default=False)
+    
+    painting = db.relationship('Painting', backref='inquiries')
+
+class SiteSettings(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(50), unique=True, nullable=False)
+    value_uk = db.Column(db.Text)
+    value_en = db.Column(db.Text)
+    value_ru = db.Column(db.Text)
+
+class CatalogState(db.Model):
+    """Single row whose version is bumped by every catalog write"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class Counter(db.Model):
+    """Dashboard statistics, maintained in the same transaction as the rows they count"""
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class InquiryStat(db.Model):
+    """Inquiries received per painting per day, for charts"""
+    painting_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class Job(db.Model):
+    """Background work queued for the job pool (see jobs.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON keyword arguments
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    result = db.Column(db.Text)  # JSON
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def get_payload(self):
+        return json.loads(self.payload)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+# ============== COUNTERS ==============
+
+def painting_counter_names(is_available, is_sold):
+    names = ['paintings_total']
+    if is_sold:
+        names.append('paintings_sold')
+    elif is_available:
+        names.append('paintings_available')
+    return names
+
+def message_counter_names(is_read):
+    return ['messages_total'] if is_read else ['messages_total', 'messages_unread']
+
+def adjust_counters(connection, deltas):
+    """Apply {counter name: delta}; bulk query.update()/delete() callers must use this directly"""
+    table = Counter.__table__
+    for name, delta in deltas.items():
+        if delta:
+            connection.execute(table.update().where(table.c.name == name).values(value=table.c.value + delta))
+
+def _previous(target, attr):
+    history = db.inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+def _counter_deltas(old_names, new_names):
+    deltas = {}
+    for name in old_names:
+        deltas[name] = deltas.get(name, 0) - 1
+    for name in new_names:
+        deltas[name] = deltas.get(name, 0) + 1
+    return deltas
+
+@db.event.listens_for(Painting, 'after_insert')
+def count_painting_insert(mapper, connection, painting):
+    adjust_counters(connection, _counter_deltas([], painting_counter_names(painting.is_available, painting.is_sold)))
+
+@db.event.listens_for(Painting, 'after_delete')
+def count_painting_delete(mapper, connection, painting):
+    adjust_counters(connection, _counter_deltas(painting_counter_names(painting.is_available, painting.is_sold), []))
+
+@db.event.listens_for(Painting, 'after_update')
+def count_painting_update(mapper, connection, painting):
+    old = painting_counter_names(_previous(painting, 'is_available'), _previous(painting, 'is_sold'))
+    adjust_counters(connection, _counter_deltas(old, painting_counter_names(painting.is_available, painting.is_sold)))
+
+@db.event.listens_for(ContactMessage, 'after_insert')
+def count_message_insert(mapper, connection, msg):
+    adjust_counters(connection, _counter_deltas([], message_counter_names(msg.is_read)))
+    if msg.painting_id and current_app.config['INQUIRY_HISTORY']:
+        day = (msg.created_at or datetime.utcnow()).date()
+        connection.execute(
+            db.text('INSERT INTO inquiry_stat (painting_id, day, count) VALUES (:painting_id, :day, 1) '
+                    'ON CONFLICT (painting_id, day) DO UPDATE SET count = count + 1'),
+            {'painting_id': msg.painting_id, 'day': day.isoformat()}
+        )
+
+@db.event.listens_for(ContactMessage, 'after_delete')
+def count_message_delete(mapper, connection, msg):
+    adjust_counters(connection, _counter_deltas(message_counter_names(msg.is_read), []))
+
+@db.event.listens_for(ContactMessage, 'after_update')
+def count_message_update(mapper, connection, msg):
+    old = message_counter_names(_previous(msg, 'is_read'))
+    adjust_counters(connection, _counter_deltas(old, message_counter_names(msg.is_read)))
+
+# ============== SCHEMA ==============
+
+def upgrade_schema(engine):
+    """Create missing tables, then bring an existing database up to the current schema version.
+
+    A database already at the latest version is left alone, without opening
+    a write transaction; new tables therefore come with a migration.
+    """
+    if stored_version(engine) >= latest_version():
+        return []
+    db.metadata.create_all(engine)
+    return run_migrations(engine)
+
+def bump_catalog_version():
+    """Invalidate cached public pages and catalog snapshots; call before committing a catalog change"""
+    # Read by catalog_snapshot after the commit, so this process's snapshot is rebuilt at once
+    db.session.info['catalog_changed'] = True
+    updated = CatalogState.query.filter_by(id=1).update({CatalogState.version: CatalogState.version + 1})
+    if not updated:
+        db.session.add(CatalogState(id=1, version=1))
+
+def _painting_features(exclude=()):
+    rows = db.session.execute(db.select(Painting.id, Painting.features)
+                              .where(Painting.features.isnot(None)).order_by(Painting.id)).all()
+    rows = [row for row in rows if row.id not in exclude]
+    return [row.id for row in rows], [json.loads(row.features) for row in rows]
+
+def _insert_neighbours(neighbours):
+    rows = [{'painting_id': painting_id, 'rank': rank, 'similar_id': similar_id, 'score': score}
+            for painting_id, rank, similar_id, score in neighbours]
+    if rows:
+        db.session.execute(SimilarPainting.__table__.insert(), rows)
+    return len(rows)
+
+def rebuild_similar_paintings():
+    """Recompute all of similar_painting from the stored features (bulk CLI changes); call before committing"""
+    ids, vectors = _painting_features()
+    db.session.execute(SimilarPainting.__table__.delete())
+    return _insert_neighbours(nearest_neighbours(ids, vectors))
+
+def update_similar_paintings(changed=(), removed=()):
+    """Bring similar_painting up to date after the features of `changed` paintings were set or
+    cleared and `removed` paintings deleted; call before committing.
+
+    Only the lists that can change are recomputed: those of the changed
+    paintings, those listing a changed or removed painting, and those a
+    changed painting now outscores the last entry of. Returns the rows written.
+    """
+    table = SimilarPainting.__table__
+    changed, removed = set(changed), set(removed)
+    ids, vectors = _painting_features(exclude=removed)
+    present = set(ids)
+    stale = (changed & present) | set(db.session.scalars(
+        db.select(table.c.painting_id).where(table.c.similar_id.in_(changed | removed)).distinct()))
+    if changed & present:
+        # Lists shorter than k, or whose last entry a changed painting now beats
+        last_rank = min(NEIGHBOURS, len(ids) - 1) - 1
+        weakest = dict(db.session.execute(
+            db.select(table.c.painting_id, table.c.score).where(table.c.rank == last_rank)).all())
+        for _, _, other_id, score in nearest_neighbours(ids, vectors, k=len(ids), among=changed & present):
+            if other_id not in weakest or score > weakest[other_id]:
+                stale.add(other_id)
+    db.session.execute(table.delete().where(table.c.painting_id.in_(stale | changed | removed)))
+    return _insert_neighbours(nearest_neighbours(ids, vectors, among=stale & present))
@@ -0,0 +1,26 @@
+"""
+Keyset pagination cursors - opaque tokens holding the sort key of the last row shown
+"""
+import base64
+import binascii
+from datetime import datetime
+import json
+
+from flask import abort
+
+
+def encode_cursor(*key):
+    """Opaque keyset cursor from the sort-key values of the last row on a page"""
+    key = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, *types):
+    """Sort-key values from a cursor, converted to `types`; aborts with 400 if malformed"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if len(key) != len(types):
+            raise ValueError(cursor)
+        return [datetime.fromisoformat(value) if kind is datetime else kind(value) for kind, value in zip(types, key)]
+    except (ValueError, TypeError, binascii.Error):
+        abort(400)
@@ -0,0 +1,66 @@
+"""
+Full-text painting search over an SQLite FTS5 index of the trilingual fields
+"""
+import re
+
+FTS_COLUMNS = (
+    'title_uk', 'title_en', 'title_ru',
+    'description_uk', 'description_en', 'description_ru',
+    'technique_uk', 'technique_en', 'technique_ru',
+)
+# bm25 weights, in FTS_COLUMNS order: titles matter most, technique least
+FTS_WEIGHTS = (10.0, 10.0, 10.0, 2.0, 2.0, 2.0, 1.0, 1.0, 1.0)
+
+# Porter stems English tokens; Cyrillic passes through unicode61 case/diacritic folding
+FTS_TOKENIZER = 'porter unicode61 remove_diacritics 2'
+
+# Common Ukrainian/Russian inflection endings, longest first
+_SLAVIC_ENDINGS = sorted((
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ими', 'ыми', 'ах', 'ях', 'ам', 'ям', 'ом', 'ем',
+    'ой', 'ей', 'ий', 'ый', 'ій', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ов', 'ев', 'ів',
+    'а', 'я', 'о', 'е', 'є', 'и', 'і', 'ї', 'ы', 'у', 'ю', 'ь',
+), key=len, reverse=True)
+_CYRILLIC = re.compile(r'[Ѐ-ӿ]')
+_TOKEN = re.compile(r'\w+')
+
+
+def create_index_sql():
+    """DDL for the external-content FTS table and the triggers keeping it in sync"""
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS painting_fts USING fts5({columns}, "
+        f"content='painting', content_rowid='id', tokenize='{FTS_TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS painting_fts_insert AFTER INSERT ON painting BEGIN "
+        f"INSERT INTO painting_fts (rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS painting_fts_delete AFTER DELETE ON painting BEGIN "
+        f"INSERT INTO painting_fts (painting_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS painting_fts_update AFTER UPDATE OF {columns} ON painting BEGIN "
+        f"INSERT INTO painting_fts (painting_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO painting_fts (rowid, {columns}) VALUES (new.id, {new_values}); END",
+        "INSERT INTO painting_fts (painting_fts) VALUES ('rebuild')",
+    ]
+
+
+def _stem(token):
+    """Strip one inflection ending from Cyrillic words so the prefix matches other forms"""
+    if _CYRILLIC.search(token):
+        for ending in _SLAVIC_ENDINGS:
+            if token.endswith(ending) and len(token) - len(ending) >= 3:
+                return token[:-len(ending)]
+    return token
+
+
+def match_expression(text):
+    """FTS5 MATCH expression requiring every word of `text`, each as a prefix"""
+    return ' '.join(f'"{_stem(token)}"*' for token in _TOKEN.findall(text.lower())[:10])
+
+
+def search_sql(limit):
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    return (
+        'SELECT painting.* FROM painting_fts JOIN painting ON painting.id = painting_fts.rowid '
+        'WHERE painting_fts MATCH :query AND painting.is_available = 1 '
+        f'ORDER BY bm25(painting_fts, {weights}) LIMIT {int(limit)}'
+    )
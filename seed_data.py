@@ -1,13 +1,13 @@
 """
 Seed initial data for Kurevin Art Gallery
 """
-from app import app, db, Admin, Painting
+from app import app, db, Admin, Painting, upgrade_schema
 from werkzeug.security import generate_password_hash
 import os
 
 def seed_data():
     with app.app_context():
-        db.create_all()
+        upgrade_schema(db.engine)
         
         # Create admin
         if not Admin.query.filter_by(username='admin').first():
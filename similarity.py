@@ -0,0 +1,40 @@
+"""
+"Similar works" - nearest neighbours between painting feature vectors.
+
+The table is kept current as paintings' features change, so the detail
+page reads its related works with one indexed lookup. NumPy is imported
+only when neighbours are computed.
+"""
+# Neighbours kept per painting; the page shows the first available ones
+NEIGHBOURS = 12
+# Rows of the similarity matrix computed at a time, bounding memory to BLOCK x paintings
+BLOCK = 512
+
+
+def nearest_neighbours(ids, vectors, k=NEIGHBOURS, among=None):
+    """Yield (painting_id, rank, similar_id, score) for the k most similar other paintings of each.
+
+    `vectors` are unit-length feature vectors (see imaging.image_features), so
+    their dot product is the cosine similarity. `among` limits the output to
+    those painting ids; their neighbours are still searched among all of `ids`.
+    """
+    import numpy as np
+    if len(ids) < 2:
+        return
+    ids = np.asarray(ids)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    positions = np.arange(len(ids)) if among is None else np.flatnonzero(np.isin(ids, list(among)))
+    k = min(k, len(ids) - 1)
+    for start in range(0, len(positions), BLOCK):
+        block = positions[start:start + BLOCK]
+        scores = matrix[block] @ matrix.T
+        rows = np.arange(len(block))
+        scores[rows, block] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for row in rows:
+            for rank in range(k):
+                yield int(ids[block[row]]), rank, int(ids[top[row, rank]]), float(top_scores[row, rank])
@@ -0,0 +1,165 @@
+"""
+SQLite under several gunicorn workers: per-connection pragmas, separate
+read/write engines and a write-behind batcher that groups concurrent inserts.
+"""
+from concurrent.futures import Future
+import os
+import queue
+import sqlite3
+import threading
+
+from flask import current_app
+import sqlalchemy as sa
+from flask_sqlalchemy.session import Session
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',       # readers never block the writer and vice versa
+    'busy_timeout': 5000,        # wait for the write lock instead of failing with "database is locked"
+    'synchronous': 'NORMAL',     # durable across app crashes; WAL makes FULL unnecessary
+    'temp_store': 'MEMORY',
+}
+
+_read_engines = {}
+_read_engines_lock = threading.Lock()
+
+
+def apply_pragmas(engine, pragmas, read_only=False):
+    """Run `pragmas` on every new DBAPI connection of `engine`.
+
+    Write connections open their transactions with BEGIN IMMEDIATE so a
+    writer waits on busy_timeout up front instead of failing on lock upgrade.
+    """
+    @sa.event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy (below) decide when transactions begin
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            try:
+                cursor.execute(f'PRAGMA {name} = {value}')
+            except sqlite3.OperationalError:
+                # e.g. journal_mode on a read-only deployment; keep the current mode
+                if name != 'journal_mode':
+                    raise
+        if read_only:
+            cursor.execute('PRAGMA query_only = ON')
+        cursor.close()
+
+    @sa.event.listens_for(engine, 'begin')
+    def on_begin(connection):
+        connection.exec_driver_sql('BEGIN' if read_only else 'BEGIN IMMEDIATE')
+
+
+def read_engine_for(engine, options, pragmas):
+    """The read-only engine paired with a write engine, created on first use"""
+    with _read_engines_lock:
+        reader = _read_engines.get(engine)
+        if reader is None:
+            reader = _read_engines[engine] = sa.create_engine(engine.url, **options)
+            apply_pragmas(reader, pragmas, read_only=True)
+        return reader
+
+
+class RoutingSession(Session):
+    """Sends reads to the read engine and writes to the write engine.
+
+    Once a transaction has written, its later reads stay on the write
+    connection so they see their own uncommitted changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or engine.dialect.name != 'sqlite':
+            return engine
+        writing = (
+            self._flushing
+            or self.info.get('writing')
+            or (mapper is None and clause is None)  # session.connection()
+            or isinstance(clause, (sa.Insert, sa.Update, sa.Delete))
+        )
+        if writing:
+            self.info['writing'] = True
+            return engine
+        return app_read_engine(engine)
+
+
+def app_read_engine(engine):
+    """The read engine for `engine`, configured from the current app"""
+    config = current_app.config
+    return read_engine_for(engine, config['SQLITE_READ_ENGINE_OPTIONS'], config['SQLITE_PRAGMAS'])
+
+
+@sa.event.listens_for(RoutingSession, 'after_transaction_end')
+def _reset_writing(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('writing', None)
+
+
+class WriteBatcher:
+    """Groups rows submitted by concurrent requests into a single write transaction.
+
+    submit() returns a Future resolved once the row's transaction commits. A
+    row submitted while no other is in flight (always, under sync workers) is
+    written at once on the caller's thread. Otherwise a background thread
+    (started lazily, and again after a fork) collects up to `max_size` rows,
+    waiting at most `max_delay` seconds after the first one.
+    """
+
+    def __init__(self, flush, max_size=100, max_delay=0.005):
+        self.flush = flush
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def submit(self, row):
+        future = Future()
+        with self._lock:
+            self._in_flight += 1
+            alone = self._in_flight == 1
+        future.add_done_callback(self._finished)
+        if alone:
+            # Nothing to group with, so waiting for a batch would only add latency
+            self._write([(row, future)])
+        else:
+            self._ensure_thread()
+            self._queue.put((row, future))
+        return future
+
+    def _finished(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='write-batcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.max_size:
+                    batch.append(self._queue.get(timeout=self.max_delay))
+            except queue.Empty:
+                pass
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            self.flush([row for row, _ in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            # Retry one by one so a single bad row does not fail its neighbours
+            for item in batch:
+                self._write([item])
+            return
+        for _, future in batch:
+            future.set_result(True)
@@ -0,0 +1,42 @@
+// Header scroll effect
+window.addEventListener('scroll', function() {
+    const header = document.getElementById('header');
+    if (window.scrollY > 50) {
+        header.classList.add('scrolled');
+    } else {
+        header.classList.remove('scrolled');
+    }
+});
+
+// Mobile menu toggle
+const mobileToggle = document.getElementById('mobileToggle');
+const mobileMenu = document.getElementById('mobileMenu');
+const mobileClose = document.getElementById('mobileClose');
+const body = document.body;
+
+function openMobileMenu() {
+    mobileMenu.classList.add('active');
+    body.style.overflow = 'hidden';
+}
+
+function closeMobileMenu() {
+    mobileMenu.classList.remove('active');
+    body.style.overflow = '';
+}
+
+mobileToggle.addEventListener('click', function(e) {
+    e.stopPropagation();
+    openMobileMenu();
+});
+
+mobileClose.addEventListener('click', function(e) {
+    e.stopPropagation();
+    closeMobileMenu();
+});
+
+// Close mobile menu on link click
+mobileMenu.querySelectorAll('a').forEach(link => {
+    link.addEventListener('click', () => {
+        closeMobileMenu();
+    });
+});
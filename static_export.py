@@ -0,0 +1,85 @@
+"""
+Static export of public pages - files for the CDN, rebuilt incrementally.
+
+Each exported page records what it was rendered from: the paintings it
+loaded and the listings (ordered id lists such as "gallery first page") it
+showed. A rebuild re-renders only pages whose paintings changed or whose
+listings now come out differently; a change to templates, translations or
+static assets re-renders everything.
+"""
+import hashlib
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def page_file(url):
+    """Exported file for a public URL: '/en/gallery?filter=sold' -> 'en/gallery/sold/index.html'"""
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split('/') if s]
+    segments += parse_qs(parts.query).get('filter', [])
+    return '/'.join([*segments, 'index.html'])
+
+
+def row_fingerprint(values):
+    return hashlib.sha1(repr(values).encode()).hexdigest()[:16]
+
+
+class ExportManifest:
+    """Dependencies of the last export, kept next to the exported files"""
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        self.site_digest = data.get('site_digest')
+        self.paintings = data.get('paintings', {})
+        self.listings = data.get('listings', {})
+        self.pages = data.get('pages', {})
+
+    def changed_paintings(self, fingerprints):
+        """Ids added, removed or modified since the last export"""
+        ids = set(self.paintings) | set(fingerprints)
+        return {int(i) for i in ids if self.paintings.get(i) != fingerprints.get(i)}
+
+    def is_stale(self, file, site_digest, changed_ids, listings):
+        page = self.pages.get(file)
+        if page is None or site_digest != self.site_digest:
+            return True
+        if changed_ids.intersection(page['paintings']):
+            return True
+        return any(listings.get(name) != self.listings.get(name) for name in page['listings'])
+
+    def save(self, site_digest, fingerprints, listings, pages):
+        self.site_digest = site_digest
+        self.paintings = fingerprints
+        self.listings = listings
+        self.pages = pages
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'site_digest': site_digest, 'paintings': fingerprints,
+                       'listings': listings, 'pages': pages}, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+def write_page(folder, file, body):
+    path = os.path.join(folder, file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(body)
+    os.replace(temp_path, path)
+
+
+def remove_page(folder, file):
+    path = os.path.join(folder, file)
+    try:
+        os.remove(path)
+        os.removedirs(os.path.dirname(path))
+    except OSError:
+        pass
@@ -0,0 +1,61 @@
+"""
+Content-addressed upload storage - files are named by the hash of their bytes
+"""
+import hashlib
+import os
+import tempfile
+import time
+
+CHUNK_SIZE = 64 * 1024
+HASH_LENGTH = 32
+TEMP_PREFIX = '.upload-'
+
+
+def store_stream(stream, folder, ext):
+    """Stream `stream` into `folder` while hashing it; returns the content-addressed filename.
+
+    Identical content maps to the same name, so a re-upload reuses the stored file.
+    """
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=TEMP_PREFIX)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        filename = f"{digest.hexdigest()[:HASH_LENGTH]}{ext.lower()}"
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return filename
+
+
+def remove_file(folder, filename):
+    try:
+        os.remove(os.path.join(folder, filename))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def find_orphans(folder, referenced, grace_seconds=3600):
+    """Paths under `folder` (relative, '/'-separated) that nothing references.
+
+    Files modified within `grace_seconds` are skipped so uploads still being
+    saved, or not yet committed, are never collected.
+    """
+    cutoff = time.time() - grace_seconds
+    orphans = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, folder).replace(os.sep, '/')
+            if relative not in referenced and os.path.getmtime(path) < cutoff:
+                orphans.append(relative)
+    return sorted(orphans)
@@ -0,0 +1,53 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_app(tmp_path, database_uri):
+    from app import create_app
+    return create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'TEMPLATE_CACHE_FOLDER': None,
+        'IMAGE_CACHE_FOLDER': str(tmp_path / 'image-cache'),
+        'JOB_MODE': 'inline',
+    })
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A copy of the bundled database, migrated as `flask migrate` would on deploy"""
+    from app import db, upgrade_schema
+    database = tmp_path / 'kurevin.db'
+    shutil.copy(os.path.join(ROOT, 'instance', 'kurevin.db'), database)
+    app = make_app(tmp_path, f'sqlite:///{database}')
+    with app.app_context():
+        upgrade_schema(db.engine)
+    return database
+
+
+@pytest.fixture
+def app(tmp_path, database):
+    return make_app(tmp_path, f'sqlite:///{database}')
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    """A client logged in to the studio as the bundled admin"""
+    from app import Admin
+    with app.app_context():
+        admin_id = Admin.query.first().id
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin_id)
+    return client
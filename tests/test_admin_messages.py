@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.mark.parametrize('next_url, location', [
+    ('/studio/messages?status=unread', '/studio/messages?status=unread'),
+    ('/studio', '/studio'),
+    ('https://evil.example/', '/studio/messages'),
+    ('//evil.example/', '/studio/messages'),
+    ('/\\evil.example/', '/studio/messages'),
+    ('/studio\\@evil.example/', '/studio/messages'),
+    ('/studiox', '/studio/messages'),
+    ('/en/gallery', '/studio/messages'),
+])
+def test_batch_redirects_only_inside_the_studio(admin_client, next_url, location):
+    response = admin_client.post('/studio/messages/batch', data={'action': 'read', 'next': next_url})
+    assert response.status_code == 302
+    assert response.headers['Location'] == location
+
+
+def test_inbox_filter_lists_inquired_paintings(app, admin_client):
+    from app import db, ContactMessage, Painting
+    with app.app_context():
+        painting = Painting.query.order_by(Painting.id).first()
+        db.session.add(ContactMessage(name='A', email='a@example.com', message='Hello', painting_id=painting.id))
+        db.session.commit()
+        painting_id, others = painting.id, [p.id for p in Painting.query.filter(Painting.id != painting.id)]
+    html = admin_client.get('/studio/messages').get_data(as_text=True)
+    assert f'value="{painting_id}"' in html
+    assert not any(f'value="{other}"' in html for other in others)
@@ -0,0 +1,32 @@
+import io
+
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def upload_folder(app, tmp_path):
+    folder = tmp_path / 'uploads'
+    folder.mkdir()
+    app.config['UPLOAD_FOLDER'] = str(folder)
+    return folder
+
+
+def png_bytes():
+    out = io.BytesIO()
+    Image.new('RGB', (8, 8), (200, 40, 40)).save(out, 'PNG')
+    out.seek(0)
+    return out
+
+
+@pytest.mark.parametrize('name', ['картина.PNG', 'painting.png', '.png'])
+def test_upload_keeps_the_extension_of_non_ascii_names(app, admin_client, upload_folder, name):
+    from app import Painting
+    response = admin_client.post('/studio/paintings/add', data={
+        'title_uk': 'Картина', 'title_en': 'Painting', 'title_ru': 'Картина',
+        'image': (png_bytes(), name),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+    with app.app_context():
+        image = Painting.query.order_by(Painting.id.desc()).first().image
+    assert image.endswith('.png') and (upload_folder / image).exists()
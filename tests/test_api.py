@@ -0,0 +1,28 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+@pytest.mark.parametrize('query', ['limit=1&_external=1', 'limit=1&_method=POST', 'limit=1&_anchor=x',
+                                   'limit=1&x=1'])
+def test_next_link_ignores_url_for_options(client, query):
+    response = client.get(f'/api/paintings?{query}')
+    assert response.status_code == 200
+    next_url = urlsplit(response.get_json()['next'])
+    args = parse_qs(next_url.query)
+    assert next_url.path == '/api/paintings'
+    assert args['limit'] == ['1'] and 'cursor' in args
+    assert not any(key.startswith('_') for key in args)
+
+
+def test_next_link_keeps_language_and_follows(client):
+    first = client.get('/api/paintings?limit=2&lang=en&fields=id').get_json()
+    second = client.get(first['next']).get_json()
+    assert parse_qs(urlsplit(first['next']).query)['lang'] == ['en']
+    assert {p['id'] for p in first['results']}.isdisjoint(p['id'] for p in second['results'])
+
+
+@pytest.mark.parametrize('query', ['limit=abc', 'limit=', 'limit=-1', 'limit=0', 'limit=1000', 'fields=', 'fields=id,',
+                                   'fields=nope', 'lang=xx', 'filter=nope'])
+def test_invalid_parameters_are_rejected(client, query):
+    assert client.get(f'/api/paintings?{query}').status_code == 400
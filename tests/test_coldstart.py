@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+from conftest import ROOT
+
+CLI_ONLY_MODULES = ('catalog_io', 'critical_css', 'static_export')
+
+
+def test_import_skips_cli_only_modules():
+    loaded = subprocess.run(
+        [sys.executable, '-c', f'import sys, app; print(*[m for m in {CLI_ONLY_MODULES!r} if m in sys.modules])'],
+        cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+    assert loaded == []
+
+
+def test_catalog_format_choices_match_catalog_io():
+    import app
+    import catalog_io
+    assert app.CATALOG_FORMATS == catalog_io.FORMATS
@@ -0,0 +1,41 @@
+import os
+import threading
+
+from disk_cache import LOCK_DIR, LOCK_STRIPES, DiskCache
+
+
+def write(text):
+    def produce(path):
+        with open(path, 'w') as f:
+            f.write(text)
+    return produce
+
+
+def test_lock_files_stay_bounded(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10 ** 6)
+    for i in range(LOCK_STRIPES * 3):
+        cache.fetch(f'painting-{i}-640.webp', write(str(i)))
+    locks = tmp_path / LOCK_DIR
+    assert not locks.exists() or len(os.listdir(locks)) <= LOCK_STRIPES
+
+
+def test_concurrent_fetches_produce_once(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10 ** 6)
+    calls = []
+    started = threading.Barrier(8)
+
+    def produce(path):
+        calls.append(path)
+        write('x')(path)
+
+    def fetch():
+        started.wait()
+        cache.fetch('same.webp', produce)
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert (tmp_path / 'same.webp').read_text() == 'x'
@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.mark.parametrize('url', [
+    '/en/gallery?lang=ru',
+    '/en/painting/1?painting_id=2',
+    '/en/gallery?_anchor=x',
+    '/en/gallery?_scheme=x',
+    '/en/gallery?_external=1&_method=POST',
+])
+def test_query_args_colliding_with_url_for_keywords(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    # Language switcher links keep the page, without the colliding keys
+    assert b'href="/ru/' in response.data
+
+
+@pytest.mark.parametrize('url, location', [
+    ('/gallery?lang=ru', '/uk/gallery'),
+    ('/painting/1?painting_id=2', '/uk/painting/1'),
+    ('/gallery?_anchor=x', '/uk/gallery'),
+    ('/gallery?_scheme=x&filter=sold', '/uk/gallery?filter=sold'),
+])
+def test_legacy_redirect_ignores_colliding_query_args(client, url, location):
+    response = client.get(url, headers={'Accept-Language': 'uk'})
+    assert response.status_code == 302
+    assert response.headers['Location'] == location
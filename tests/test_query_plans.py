@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+from migrations import is_table_scan
+
+
+def plan(sql, setup):
+    connection = sqlite3.connect(':memory:')
+    connection.executescript(setup)
+    return [row[-1] for row in connection.execute(f'EXPLAIN QUERY PLAN {sql}')]
+
+
+SETUP = 'CREATE TABLE message (id INTEGER PRIMARY KEY, painting_id INTEGER, body TEXT);' \
+        'CREATE INDEX ix_message_painting ON message (painting_id);'
+
+
+@pytest.mark.parametrize('sql', [
+    'SELECT body FROM message',
+    'SELECT DISTINCT painting_id FROM message',  # SCAN message USING COVERING INDEX
+    'SELECT * FROM message ORDER BY painting_id',  # SCAN message USING INDEX
+])
+def test_full_scans_are_flagged(sql):
+    assert any(is_table_scan(detail) for detail in plan(sql, SETUP))
+
+
+@pytest.mark.parametrize('sql', [
+    'SELECT body FROM message WHERE id = 1',
+    'SELECT id FROM message WHERE painting_id = 1',
+    'SELECT 1',
+])
+def test_searches_are_not_flagged(sql):
+    assert not any(is_table_scan(detail) for detail in plan(sql, SETUP))
+
+
+def test_covering_index_scan_detail():
+    assert is_table_scan('SCAN message USING COVERING INDEX ix_message_painting')
+    assert not is_table_scan('SEARCH message USING COVERING INDEX ix_message_painting (painting_id=?)')
+    assert not is_table_scan('SCAN catalog_state')
+    assert not is_table_scan('SCAN painting_fts VIRTUAL TABLE INDEX 0:M9')
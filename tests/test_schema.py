@@ -0,0 +1,63 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import ROOT, make_app
+
+URLS = ['/uk/', '/uk/gallery', '/en/about', '/api/paintings']
+
+
+def test_migrate_brings_database_to_latest_version(database):
+    from migrations import latest_version
+    with sqlite3.connect(database) as connection:
+        assert connection.execute('PRAGMA user_version').fetchone()[0] == latest_version()
+
+
+def test_bundled_database_is_current_and_readable_without_wal():
+    """Vercel serves instance/kurevin.db from a read-only filesystem; re-run flask migrate after adding a migration"""
+    from migrations import latest_version
+    path = os.path.join(ROOT, 'instance', 'kurevin.db')
+    with sqlite3.connect(f'file:{path}?mode=ro', uri=True) as connection:
+        assert connection.execute('PRAGMA user_version').fetchone()[0] == latest_version()
+        assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_current_database_is_served_read_only(tmp_path, database, url):
+    app = make_app(tmp_path, f'sqlite:///file:{database}?mode=ro&uri=true')
+    response = app.test_client().get(url)
+    assert response.status_code == 200
+
+
+def test_upgrade_of_current_database_writes_nothing(tmp_path, database):
+    from app import db, upgrade_schema
+    app = make_app(tmp_path, f'sqlite:///file:{database}?mode=ro&uri=true')
+    with app.app_context():
+        assert upgrade_schema(db.engine) == []
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_outdated_database_is_upgraded_on_first_use(tmp_path, url):
+    from app import Admin
+    path = tmp_path / 'old.db'
+    shutil.copy(os.path.join(ROOT, 'instance', 'kurevin.db'), path)
+    with sqlite3.connect(path) as connection:
+        # As before migration 10
+        connection.execute('DROP INDEX ix_similar_painting_similar')
+        connection.execute('PRAGMA user_version = 9')
+    app = make_app(tmp_path, f'sqlite:///{path}')
+    assert app.test_client().get(url).status_code == 200
+    with app.app_context():
+        assert app.extensions['schema_migrations'] == [(10, 'index for the similar works lists that name a painting')]
+        assert Admin.query.count()
+
+
+def test_new_database_gets_the_schema_and_admin(tmp_path):
+    from app import Admin, init_db
+    app = make_app(tmp_path, f'sqlite:///{tmp_path / "new.db"}')
+    init_db(app)
+    with app.app_context():
+        assert Admin.query.filter_by(username='admin').count() == 1
+    assert app.test_client().get('/uk/').status_code == 200
@@ -0,0 +1,88 @@
+import json
+import random
+
+import pytest
+
+
+def new_painting(rng, title):
+    from app import Painting
+    return Painting(title_uk=title, title_en=title, title_ru=title, features=json.dumps(unit_vector(rng)))
+
+
+def unit_vector(rng, size=8):
+    vector = [rng.random() for _ in range(size)]
+    norm = sum(x * x for x in vector) ** 0.5
+    return [x / norm for x in vector]
+
+
+def neighbour_lists():
+    from app import db
+    from models import SimilarPainting
+    lists = {}
+    for row in db.session.execute(db.select(SimilarPainting).order_by(SimilarPainting.painting_id,
+                                                                       SimilarPainting.rank)).scalars():
+        lists.setdefault(row.painting_id, []).append(row.similar_id)
+    return lists
+
+
+def full_rebuild():
+    from models import rebuild_similar_paintings
+    rebuild_similar_paintings()
+    return neighbour_lists()
+
+
+@pytest.fixture
+def catalog(app):
+    """20 more paintings, all with features, and a fully built index"""
+    from app import db, Painting
+    rng = random.Random(7)
+    with app.app_context():
+        for painting in Painting.query:
+            painting.features = json.dumps(unit_vector(rng))
+        for i in range(20):
+            db.session.add(new_painting(rng, f'Painting {i}'))
+        db.session.flush()
+        full_rebuild()
+        db.session.commit()
+        yield rng
+
+
+@pytest.mark.parametrize('count', [1, 3])
+def test_update_after_features_change_matches_full_rebuild(catalog, count):
+    from app import db, Painting
+    from models import update_similar_paintings
+    changed = [p.id for p in Painting.query.order_by(Painting.id).limit(count)]
+    for painting_id in changed:
+        db.session.get(Painting, painting_id).features = json.dumps(unit_vector(catalog))
+    db.session.flush()
+    update_similar_paintings(changed=changed)
+    assert neighbour_lists() == full_rebuild()
+
+
+def test_update_after_features_cleared_matches_full_rebuild(catalog):
+    from app import db, Painting
+    from models import update_similar_paintings
+    painting = Painting.query.order_by(Painting.id).first()
+    painting.features = None
+    db.session.flush()
+    update_similar_paintings(changed=[painting.id])
+    assert neighbour_lists() == full_rebuild()
+
+
+def test_update_after_delete_matches_full_rebuild(catalog):
+    from app import db, Painting
+    from models import update_similar_paintings
+    painting = Painting.query.order_by(Painting.id.desc()).first()
+    db.session.delete(painting)
+    update_similar_paintings(removed=[painting.id])
+    assert neighbour_lists() == full_rebuild()
+
+
+def test_update_after_new_painting_matches_full_rebuild(catalog):
+    from app import db
+    from models import update_similar_paintings
+    painting = new_painting(catalog, 'New')
+    db.session.add(painting)
+    db.session.flush()
+    update_similar_paintings(changed=[painting.id])
+    assert neighbour_lists() == full_rebuild()
@@ -0,0 +1,28 @@
+import json
+import os
+import re
+
+from conftest import ROOT
+
+
+def test_exported_pages_fall_back_to_the_app():
+    """export/ is built by flask export-static outside git; a deploy without it must still serve every page"""
+    with open(os.path.join(ROOT, 'vercel.json')) as f:
+        routes = json.load(f)['routes']
+    exported = [route for route in routes if route.get('dest', '').startswith('/export/')]
+    assert exported and all(route.get('check') for route in exported)
+    assert routes[-1] == {'src': '/(.*)', 'dest': '/app.py'}
+
+
+def test_only_hash_shaped_versions_are_cached_for_good():
+    """Mirrors static_cache_headers: ?v= must look like a static-manifest digest to be immutable"""
+    from assets import HASH_LENGTH
+    with open(os.path.join(ROOT, 'vercel.json')) as f:
+        routes = json.load(f)['routes']
+    immutable = [route for route in routes if 'immutable' in route.get('headers', {}).get('Cache-Control', '')]
+    assert immutable
+    for route in immutable:
+        version = next(condition for condition in route['has'] if condition['key'] == 'v')
+        pattern = re.compile(version['value'])
+        assert pattern.fullmatch('0f' * (HASH_LENGTH // 2))
+        assert not pattern.fullmatch('1') and not pattern.fullmatch('latest') and not pattern.fullmatch('0' * 40)
@@ -0,0 +1,54 @@
+import threading
+
+from sqlite_concurrency import WriteBatcher
+
+
+def test_lone_submission_is_written_on_the_callers_thread():
+    batches = []
+    batcher = WriteBatcher(lambda rows: batches.append((threading.current_thread(), rows)), max_delay=10)
+    for row in ('a', 'b'):
+        assert batcher.submit(row).result(timeout=1)
+    assert batches == [(threading.current_thread(), ['a']), (threading.current_thread(), ['b'])]
+    assert batcher._thread is None
+
+
+def test_concurrent_submissions_are_grouped():
+    release = threading.Event()
+    batches = []
+
+    def flush(rows):
+        if rows == ['first']:
+            release.wait(timeout=5)
+        batches.append(rows)
+
+    batcher = WriteBatcher(flush, max_delay=0.05)
+    first = threading.Thread(target=lambda: batcher.submit('first').result(timeout=5))
+    first.start()
+    while not batches and batcher._in_flight == 0:
+        pass
+    # 'first' is being written on its own thread; these arrive meanwhile
+    futures = [batcher.submit(row) for row in ('b', 'c', 'd')]
+    release.set()
+    first.join()
+    for future in futures:
+        assert future.result(timeout=5)
+    assert batches[0] == ['first']
+    assert sorted(row for batch in batches[1:] for row in batch) == ['b', 'c', 'd']
+    assert len(batches) < 4
+
+
+def test_contact_message_is_stored(app, client):
+    from app import ContactMessage
+    response = client.post('/en/contact', data={'name': 'A', 'email': 'a@example.com', 'message': 'Hello'})
+    assert response.status_code == 302
+    with app.app_context():
+        assert ContactMessage.query.filter_by(email='a@example.com').count() == 1
+
+
+def test_contact_message_with_unknown_painting_is_stored(app, client):
+    from app import ContactMessage
+    response = client.post('/en/contact', data={'name': 'B', 'email': 'b@example.com', 'message': 'Hi',
+                                                'painting_id': 'abc'})
+    assert response.status_code == 302
+    with app.app_context():
+        assert ContactMessage.query.filter_by(email='b@example.com').one().painting_id is None